@@ -0,0 +1,55 @@
+"""
+Boxplot payload and build time: px.box over every row against boxes built
+from server-side statistics (utils.visualizations.box_stats), on the
+credit-card dataset resampled to n rows.
+
+    python -m benchmarks.bench_boxplot_payload [n_rows ...]
+"""
+
+import sys
+
+import plotly.express as px
+
+from benchmarks.bench_rfm import timed
+from utils.load_file import read_dataset
+from utils.visualizations import _box_figure, box_stats
+
+TARGET = "Categoria"
+
+
+def raw_figures(df, columns):
+    return [px.box(df, x=TARGET, y=col, color=TARGET) for col in columns]
+
+
+def summary_figures(df, columns):
+    figures = []
+    for col in columns:
+        stats, outliers = box_stats(df, TARGET, col)
+        figures.append(_box_figure(stats, outliers, TARGET, col))
+    return figures
+
+
+def payload(figures):
+    return sum(len(fig.to_json()) for fig in figures)
+
+
+def main(sizes):
+    source = read_dataset("bank_credit_card_cancellation.csv")
+    columns = source.select_dtypes(include=["number"]).columns.tolist()
+    print(
+        f"{'linhas':>10} {'px.box (ms)':>12} {'px.box (KB)':>12} "
+        f"{'resumo (ms)':>12} {'resumo (KB)':>12} {'redução':>8}"
+    )
+    for n in sizes:
+        df = source.sample(n, replace=True, random_state=42, ignore_index=True)
+        raw, t_raw = timed(raw_figures, df, columns)
+        summary, t_summary = timed(summary_figures, df, columns)
+        raw_kb, summary_kb = payload(raw) / 1024, payload(summary) / 1024
+        print(
+            f"{n:>10} {t_raw * 1000:12.1f} {raw_kb:12.1f} "
+            f"{t_summary * 1000:12.1f} {summary_kb:12.1f} {raw_kb / summary_kb:7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,82 @@
+"""
+Wall time of the univariate/bivariate grid cells (aggregation + figure, as
+in show_univariate_grid/show_bivariate_grid without rendering) built by
+utils.visualizations.build_figures with 1..N threads, against the number of
+columns. The credit-card dataset is widened with noisy copies of its
+numeric columns.
+
+    python -m benchmarks.bench_grid_workers [n_columns ...]
+
+The shared grid pool is sized from GRID_WORKERS when utils.visualizations is
+imported, so it is set here to the largest thread count measured.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+WORKERS = sorted({1, 2, 4, os.cpu_count() or 1})
+os.environ["GRID_WORKERS"] = str(WORKERS[-1])
+
+from benchmarks.bench_rfm import timed
+from utils.load_file import read_dataset
+from utils.visualizations import (
+    _box_figure,
+    _histogram_figure,
+    box_stats,
+    build_figures,
+    histogram_counts,
+)
+
+TARGET = "Categoria"
+
+
+def widen(source, n_columns, seed=42):
+    """source with n_columns numeric columns (copies scaled by noise)."""
+    rng = np.random.default_rng(seed)
+    numeric = source.select_dtypes(include=["number"]).columns.tolist()
+    columns = {}
+    for i in range(n_columns):
+        base = numeric[i % len(numeric)]
+        noise = rng.normal(1.0, 0.05, len(source))
+        columns[f"{base}_{i}"] = source[base].to_numpy(dtype=np.float64) * noise
+    return source[[TARGET]].assign(**columns), list(columns)
+
+
+def histogram_cell(df, col):
+    counts = histogram_counts(df, col, TARGET)
+    return _histogram_figure(counts, col, TARGET, col, "group", None, None)
+
+
+def boxplot_cell(df, col):
+    stats, outliers = box_stats(df, TARGET, col)
+    return _box_figure(stats, outliers, TARGET, col, f"{col} vs {TARGET}")
+
+
+def grid(df, columns, workers):
+    for cell in (histogram_cell, boxplot_cell):
+        list(build_figures(lambda col: cell(df, col), columns, workers))
+
+
+def main(sizes):
+    source = read_dataset("bank_credit_card_cancellation.csv")
+    workers = WORKERS
+    print(f"{len(source):,} linhas, {os.cpu_count() or 1} CPUs")
+    print(
+        f"{'colunas':>8} "
+        + " ".join(f"{f'{w} thread(s) (ms)':>18}" for w in workers)
+        + f" {'ganho':>7}"
+    )
+    for n in sizes:
+        df, columns = widen(source, n)
+        times = [timed(grid, df, columns, w)[1] for w in workers]
+        print(
+            f"{n:>8} "
+            + " ".join(f"{t * 1000:18.1f}" for t in times)
+            + f" {times[0] / min(times):6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [6, 12, 24, 48])
@@ -0,0 +1,82 @@
+"""
+Varejo business questions as group-and-aggregate queries (utils.query) on
+each available backend: pandas in memory, DuckDB and Polars scanning the
+Parquet export. "1ª execução" includes writing that export; "arquivo" runs
+the same questions with a Parquet file as the source (the out-of-core path,
+where pandas reads the needed columns on every query).
+
+    python -m benchmarks.bench_query_backends [n_rows ...]
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.bench_rfm import timed
+from benchmarks.bench_varejo_cube import make_retail_data, prepare
+from utils.paths import QUERY_DIR
+from utils.query import BACKENDS, group_aggregate, resolve_backend
+
+SALES = {"Valor_Venda": ("Valor_Venda", "sum")}
+
+QUESTIONS = [
+    ("Cidade", SALES),
+    ("Data_Pedido", SALES),
+    ("Estado", SALES),
+    ("Segmento", SALES),
+    (["Ano", "Segmento"], SALES),
+    (["Segmento", "Ano", "Mes"], {"Valor_Venda": ("Valor_Venda", "mean")}),
+    (["Categoria", "SubCategoria"], SALES),
+    ("Categoria", {"Pedidos": ("ID_Pedido", "nunique"), "Linhas": ("ID_Pedido", "size")}),
+]
+
+
+def run_questions(df, version, backend):
+    return [
+        group_aggregate(df, version, by, agg, backend=backend)
+        for by, agg in QUESTIONS
+    ]
+
+
+def check(expected, results):
+    """Same groups and aggregated totals as the pandas backend."""
+    for (_, agg), want, got in zip(QUESTIONS, expected, results):
+        assert len(want) == len(got)
+        for out in agg:
+            assert np.isclose(want[out].sum(), got[out].sum()), out
+
+
+def main(sizes):
+    backends = [b for b in BACKENDS if resolve_backend(b) == b]
+    print(f"backends disponíveis: {', '.join(backends)}")
+    print(
+        f"{'linhas':>10} {'backend':>8} {'1ª execução (ms)':>17} "
+        f"{'repetição (ms)':>15} {'arquivo (ms)':>13}"
+    )
+    for n in sizes:
+        df = prepare(make_retail_data(n))
+        expected = run_questions(df, None, "pandas")
+        existing = set(QUERY_DIR.glob("*.parquet"))
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "retail.parquet"
+            df.to_parquet(source, index=False)
+            for backend in backends:
+                version = f"bench-{n}-{backend}"
+                results, t_cold = timed(run_questions, df, version, backend)
+                _, t_warm = timed(run_questions, df, version, backend)
+                check(expected, results)
+                from_file, t_file = timed(run_questions, source, version, backend)
+                check(expected, from_file)
+                print(
+                    f"{n:>10} {backend:>8} {t_cold * 1000:17.1f} "
+                    f"{t_warm * 1000:15.1f} {t_file * 1000:13.1f}"
+                )
+        # Exports written by this run only
+        for path in set(QUERY_DIR.glob("*.parquet")) - existing:
+            path.unlink()
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
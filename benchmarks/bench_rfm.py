@@ -0,0 +1,114 @@
+"""
+Throughput of the vectorized RFM engine (utils.rfm.compute_rfm) against the
+original row-wise implementation, on synthetic customers.
+
+    python -m benchmarks.bench_rfm [n_customers ...]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.rfm import MONETARY_COLS, compute_rfm, get_segment, score_rfm
+
+
+def make_synthetic_data(n_customers, tx_per_customer=10, seed=42):
+    """
+    Transactions and purchase summary shaped like the mercado_* workbooks.
+    """
+    rng = np.random.default_rng(seed)
+    n_tx = n_customers * tx_per_customer
+    df_transacoes = pd.DataFrame(
+        {
+            "id_transacao": np.arange(n_tx, dtype=np.int64),
+            # Skewed frequency: some customers buy much more often
+            "id_cliente": rng.zipf(1.3, n_tx) % n_customers,
+            "data_transacao": pd.Timestamp("2020-07-30")
+            + pd.to_timedelta(rng.integers(0, 885, n_tx), unit="D"),
+        }
+    )
+    df_merged = pd.DataFrame(
+        {"id_cliente": np.arange(n_customers)}
+        | {
+            col: rng.integers(0, 500, n_customers, dtype=np.int32)
+            for col in MONETARY_COLS
+        }
+    )
+    return df_transacoes, df_merged
+
+
+def legacy_rfm(df_transacoes, df_merged):
+    """
+    The original generate_rfm_data: lambda inside groupby().agg() and
+    row-wise apply for the segments.
+    """
+    reference_date = df_transacoes["data_transacao"].max() + pd.Timedelta(days=1)
+    rf_metrics = (
+        df_transacoes.groupby("id_cliente")
+        .agg(
+            {
+                "data_transacao": lambda x: (reference_date - x.max()).days,
+                "id_transacao": "count",
+            }
+        )
+        .reset_index()
+    )
+    rf_metrics.columns = ["id_cliente", "Recency", "Frequency"]
+    df_merged = df_merged.assign(Monetary=df_merged[MONETARY_COLS].sum(axis=1))
+    rfm = pd.merge(
+        rf_metrics, df_merged[["id_cliente", "Monetary"]], on="id_cliente", how="left"
+    )
+    rfm["Monetary"] = rfm["Monetary"].fillna(0)
+    rfm["R_Score"] = pd.qcut(rfm["Recency"], 5, labels=[5, 4, 3, 2, 1])
+    rfm["F_Score"] = pd.qcut(
+        rfm["Frequency"].rank(method="first"), 5, labels=[1, 2, 3, 4, 5]
+    )
+    rfm["M_Score"] = pd.qcut(rfm["Monetary"], 5, labels=[1, 2, 3, 4, 5])
+    rfm["RFM_Score"] = rfm["R_Score"].astype(str) + rfm["F_Score"].astype(str)
+    rfm["Segment"] = rfm.apply(
+        lambda row: get_segment(int(row["R_Score"]), int(row["F_Score"])), axis=1
+    )
+    return rfm
+
+
+def assert_same_output(legacy, engine):
+    for col in ["id_cliente", "Recency", "Frequency", "Monetary"]:
+        np.testing.assert_array_equal(legacy[col].to_numpy(), engine[col].to_numpy())
+    for col in ["R_Score", "F_Score", "M_Score", "RFM_Score", "Segment"]:
+        np.testing.assert_array_equal(
+            legacy[col].astype(str).to_numpy(), engine[col].astype(str).to_numpy()
+        )
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main(sizes):
+    print(
+        f"{'clientes':>10} {'legado (s)':>11} {'engine (s)':>11} "
+        f"{'M clientes/s':>13} {'scoring M/s':>12}"
+    )
+    for n in sizes:
+        df_transacoes, df_merged = make_synthetic_data(n)
+        engine, t_engine = timed(compute_rfm, df_transacoes, df_merged)
+        # Scoring + segments only, on the already aggregated R/F/M columns
+        _, t_score = timed(score_rfm, engine[["Recency", "Frequency", "Monetary"]])
+        if n <= 200_000:
+            legacy, t_legacy = timed(legacy_rfm, df_transacoes, df_merged)
+            assert_same_output(legacy, engine)
+            legacy_col = f"{t_legacy:11.2f}"
+        else:
+            legacy_col = f"{'-':>11}"
+        print(
+            f"{n:>10} {legacy_col} {t_engine:11.3f} "
+            f"{len(engine) / t_engine / 1e6:13.2f} {len(engine) / t_score / 1e6:12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,36 @@
+"""
+Scaling of the batch RFM CLI's sharded scoring (utils.rfm_batch.run_batch)
+with the number of worker processes, on synthetic customers.
+
+    python -m benchmarks.bench_rfm_batch [n_customers] [workers ...]
+"""
+
+import os
+import sys
+
+from benchmarks.bench_rfm import assert_same_output, make_synthetic_data, timed
+from utils.rfm import compute_rfm
+from utils.rfm_batch import run_batch
+
+
+def main(n_customers, worker_counts):
+    df_transacoes, df_merged = make_synthetic_data(n_customers)
+    reference, t_single = timed(compute_rfm, df_transacoes, df_merged)
+    print(f"{n_customers:,} clientes, {len(df_transacoes):,} transações")
+    print(f"compute_rfm (1 processo, sem shards): {t_single:.2f}s")
+    print(f"{'processos':>10} {'tempo (s)':>10} {'speedup':>8} {'M tx/s':>8}")
+    for workers in worker_counts:
+        (rfm, _), seconds = timed(run_batch, df_transacoes, df_merged, workers)
+        assert_same_output(reference, rfm)
+        print(
+            f"{workers:>10} {seconds:10.2f} {t_single / seconds:7.2f}x "
+            f"{len(df_transacoes) / seconds / 1e6:8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    counts = [int(arg) for arg in sys.argv[2:]] or sorted(
+        {1, 2, 4, os.cpu_count() or 1}
+    )
+    main(n, counts)
@@ -0,0 +1,54 @@
+"""
+Daily RFM refresh: full recompute over the whole transaction history
+(utils.rfm.compute_rfm) against RFMStore absorbing only the new day.
+
+    python -m benchmarks.bench_rfm_incremental [n_customers ...] [--tx N]
+
+--tx sets the transactions per customer: the full recompute grows with the
+history, the store's refresh with the delta (update) and the number of
+customers (to_rfm).
+"""
+
+import sys
+
+import numpy as np
+
+from benchmarks.bench_rfm import assert_same_output, make_synthetic_data, timed
+from utils.rfm import RFMStore, compute_rfm
+
+
+def main(sizes, days=5, tx_per_customer=10):
+    print(
+        f"{'clientes':>10} {'histórico':>10} {'delta (tx)':>11} "
+        f"{'completo (s)':>13} {'update (s)':>11} {'to_rfm (s)':>11} {'ganho':>7}"
+    )
+    for n in sizes:
+        df_transacoes, df_merged = make_synthetic_data(n, tx_per_customer)
+        df_transacoes = df_transacoes.sort_values("data_transacao", kind="stable")
+        cut = df_transacoes["data_transacao"].max() - np.timedelta64(days, "D")
+        history = df_transacoes[df_transacoes["data_transacao"] <= cut]
+        store = RFMStore.from_transactions(history)
+
+        for day in range(1, days + 1):
+            limit = cut + np.timedelta64(day, "D")
+            seen = df_transacoes[df_transacoes["data_transacao"] <= limit]
+            delta = seen[seen["data_transacao"] > limit - np.timedelta64(1, "D")]
+
+            full, t_full = timed(compute_rfm, seen, df_merged)
+            _, t_update = timed(store.update, delta)
+            incremental, t_rfm = timed(store.to_rfm, df_merged)
+            assert_same_output(full, incremental)
+            print(
+                f"{n:>10} {len(seen):>10} {len(delta):>11} {t_full:13.3f} "
+                f"{t_update:11.4f} {t_rfm:11.3f} {t_full / (t_update + t_rfm):6.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    tx_per_customer = 10
+    if "--tx" in args:
+        at = args.index("--tx")
+        tx_per_customer = int(args[at + 1])
+        del args[at : at + 2]
+    main([int(arg) for arg in args] or [100_000, 1_000_000], 5, tx_per_customer)
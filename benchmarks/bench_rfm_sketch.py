@@ -0,0 +1,65 @@
+"""
+Quintile scoring through RFMSketch (streamed chunks, bounded memory) against
+exact pd.qcut over the whole customer table, with the sketch's rank error.
+
+    python -m benchmarks.bench_rfm_sketch [n_customers ...]
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_rfm import timed
+from utils.rfm import RFMSketch, quintile_codes, sketch_error_report
+
+CHUNK_SIZE = 1_000_000
+EXACT_LIMIT = 5_000_000
+
+
+def synthetic_chunks(n_customers, seed=7):
+    """
+    Already aggregated Recency/Frequency/Monetary, generated chunk by chunk
+    so the whole table never needs to exist.
+    """
+    for start in range(0, n_customers, CHUNK_SIZE):
+        rng = np.random.default_rng([seed, start])
+        size = min(CHUNK_SIZE, n_customers - start)
+        yield pd.DataFrame(
+            {
+                "Recency": rng.integers(1, 886, size),
+                "Frequency": rng.zipf(1.6, size) % 200 + 1,
+                "Monetary": rng.gamma(1.5, 400, size).round(),
+            }
+        )
+
+
+def stream_scores(n_customers):
+    sketch = RFMSketch(seed=0)
+    for chunk in synthetic_chunks(n_customers):
+        sketch.update(chunk)
+    parts = list(sketch.quintile_codes(synthetic_chunks(n_customers)))
+    return sketch, parts
+
+
+def main(sizes):
+    for n in sizes:
+        (sketch, parts), t_sketch = timed(stream_scores, n)
+        retained = sum(s.retained for s in sketch.sketches.values())
+        print(
+            f"\n{n:,} clientes: sketch {t_sketch:.2f}s "
+            f"({n / t_sketch / 1e6:.2f} M/s), {retained} itens retidos"
+        )
+        if n > EXACT_LIMIT:
+            continue
+        rfm = pd.concat(list(synthetic_chunks(n)), ignore_index=True)
+        _, t_exact = timed(
+            quintile_codes, rfm["Recency"], rfm["Frequency"], rfm["Monetary"]
+        )
+        codes = tuple(np.concatenate([p[i] for p in parts]) for i in range(3))
+        print(f"qcut exato {t_exact:.2f}s (tabela inteira em memória)")
+        print(sketch_error_report(rfm, sketch, codes).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000_000, 5_000_000, 20_000_000])
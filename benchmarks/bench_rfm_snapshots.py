@@ -0,0 +1,48 @@
+"""
+Monthly RFM snapshots: one compute_rfm per month-end over the truncated
+history against utils.rfm.monthly_rfm_snapshots (single sorted pass).
+
+    python -m benchmarks.bench_rfm_snapshots [n_customers ...]
+"""
+
+import sys
+
+import pandas as pd
+
+from benchmarks.bench_rfm import assert_same_output, make_synthetic_data, timed
+from utils.rfm import compute_rfm, monthly_rfm_snapshots, segment_migrations
+
+
+def per_month_recompute(df_transacoes, df_merged, month_ends):
+    return {
+        month_end: compute_rfm(
+            df_transacoes[df_transacoes["data_transacao"] <= month_end], df_merged
+        )
+        for month_end in month_ends
+    }
+
+
+def main(sizes):
+    print(
+        f"{'clientes':>10} {'snapshots':>10} {'recálculo (s)':>14} "
+        f"{'passada única (s)':>18} {'transições (s)':>15}"
+    )
+    for n in sizes:
+        df_transacoes, df_merged = make_synthetic_data(n)
+        (snapshots, _), t_single = timed(
+            monthly_rfm_snapshots, df_transacoes, df_merged
+        )
+        _, t_migrations = timed(segment_migrations, snapshots)
+        naive, t_naive = timed(
+            per_month_recompute, df_transacoes, df_merged, list(snapshots)
+        )
+        for month_end in snapshots:
+            assert_same_output(naive[month_end], snapshots[month_end])
+        print(
+            f"{n:>10} {len(snapshots):>10} {t_naive:14.2f} "
+            f"{t_single:18.2f} {t_migrations:15.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 500_000])
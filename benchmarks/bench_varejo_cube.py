@@ -0,0 +1,82 @@
+"""
+Varejo business questions: one groupby per question over the raw rows (the
+page before the cube) against slicing the rollup cube (utils.cube).
+
+    python -m benchmarks.bench_varejo_cube [n_rows ...]
+"""
+
+import sys
+
+import numpy as np
+
+from benchmarks.bench_rfm import timed
+from utils.cube import build_cube, rollup, totals
+from utils.dates import add_date_dimension
+from utils.load_file import read_dataset
+
+DIMENSIONS = ["Ano", "Mes", "Segmento", "Estado", "Cidade", "Categoria", "SubCategoria"]
+
+
+def make_retail_data(n_rows, seed=42):
+    """
+    retail.csv resampled to n_rows (same columns, cardinalities and raw
+    dd/mm/yyyy order dates).
+    """
+    df = read_dataset("retail.csv")
+    return df.sample(n_rows, replace=True, random_state=seed, ignore_index=True)
+
+
+def prepare(df):
+    """The page's date step (pipeline converter_datas)."""
+    return add_date_dimension(df, "Data_Pedido", format="%d/%m/%Y")
+
+
+def raw_questions(df):
+    office = df[df["Categoria"] == "Office Supplies"]
+    office.groupby("Cidade")["Valor_Venda"].sum().idxmax()
+    office.groupby("Cidade")["Valor_Venda"].sum().max()
+    df.groupby("Data_Pedido")["Valor_Venda"].sum()
+    df.groupby("Estado")["Valor_Venda"].sum()
+    df.groupby("Cidade")["Valor_Venda"].sum().nlargest(10)
+    df.groupby("Segmento")["Valor_Venda"].sum()
+    df.groupby(["Ano", "Segmento"])["Valor_Venda"].sum()
+    sales = df["Valor_Venda"]
+    (sales > 1000).sum(), np.where(sales > 1000, sales * 0.85, sales).mean()
+    df.groupby(["Segmento", "Ano_Mes"])["Valor_Venda"].mean()
+    df.groupby("SubCategoria")["Valor_Venda"].sum().nlargest(12)
+
+
+def cube_questions(cube):
+    office = rollup(
+        cube, ["Cidade"], "Valor_Venda", filters={"Categoria": "Office Supplies"}
+    )
+    office.loc[office["Valor_Venda"].idxmax()]
+    rollup(cube, ["Estado"], "Valor_Venda")
+    rollup(cube, ["Cidade"], "Valor_Venda").nlargest(10, "Valor_Venda")
+    rollup(cube, ["Segmento"], "Valor_Venda")
+    rollup(cube, ["Ano", "Segmento"], "Valor_Venda")
+    totals(cube, "Valor_Venda")
+    rollup(cube, ["Segmento", "Ano", "Mes"], "Valor_Venda", agg="mean")
+    rollup(cube, ["Categoria", "SubCategoria"], "Valor_Venda").nlargest(
+        12, "Valor_Venda"
+    )
+
+
+def main(sizes):
+    print(
+        f"{'linhas':>10} {'células':>8} {'groupbys (ms)':>14} "
+        f"{'cubo: criar (ms)':>17} {'cubo: 10 perguntas (ms)':>24}"
+    )
+    for n in sizes:
+        df = prepare(make_retail_data(n))
+        _, t_raw = timed(raw_questions, df)
+        cube, t_build = timed(build_cube, df, DIMENSIONS, "Valor_Venda", 1000)
+        _, t_cube = timed(cube_questions, cube)
+        print(
+            f"{n:>10} {len(cube):>8} {t_raw * 1000:14.1f} "
+            f"{t_build * 1000:17.1f} {t_cube * 1000:24.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
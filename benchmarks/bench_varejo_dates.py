@@ -0,0 +1,61 @@
+"""
+Varejo date step: pd.to_datetime(dayfirst=True) plus per-row .dt accessors
+and strftime (the page before utils.dates) against add_date_dimension, with
+the known dd/mm/yyyy format and with inference over the distinct strings.
+
+    python -m benchmarks.bench_varejo_dates [n_rows ...]
+"""
+
+import sys
+
+import pandas as pd
+
+from benchmarks.bench_rfm import timed
+from benchmarks.bench_varejo_cube import make_retail_data
+from utils.dates import add_date_dimension
+
+
+def row_wise(df):
+    """The page's previous converter_datas."""
+    dates = pd.to_datetime(df["Data_Pedido"], dayfirst=True, errors="coerce")
+    return df.assign(
+        Data_Pedido=dates,
+        Ano=dates.dt.year,
+        Mes=dates.dt.month,
+        Ano_Mes=dates.dt.strftime("%Y/%m"),
+    )
+
+
+def check(expected, result):
+    pd.testing.assert_series_equal(
+        result["Data_Pedido"], expected["Data_Pedido"], check_dtype=False
+    )
+    for col in ["Ano", "Mes"]:
+        assert (result[col].astype("int64") == expected[col]).all(), col
+    assert (result["Ano_Mes"].astype(str) == expected["Ano_Mes"]).all()
+
+
+def main(sizes):
+    print(
+        f"{'linhas':>10} {'por linha (ms)':>15} {'formato (ms)':>13} "
+        f"{'inferência (ms)':>16} {'ganho':>7}"
+    )
+    for n in sizes:
+        df = make_retail_data(n)
+        expected, t_row = timed(row_wise, df)
+        fixed, t_fixed = timed(
+            add_date_dimension, df.copy(), "Data_Pedido", "%d/%m/%Y"
+        )
+        inferred, t_inferred = timed(
+            add_date_dimension, df.copy(), "Data_Pedido", None, True
+        )
+        check(expected, fixed)
+        check(expected, inferred)
+        print(
+            f"{n:>10} {t_row * 1000:15.1f} {t_fixed * 1000:13.1f} "
+            f"{t_inferred * 1000:16.1f} {t_row / t_fixed:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,53 @@
+"""
+Discount what-if grid for Varejo Q7/Q8: one np.where pass over the orders
+per (threshold, rate) scenario against utils.discounts (one sort, then a
+binary search per threshold and a broadcast over the rates).
+
+    python -m benchmarks.bench_varejo_discounts [n_rows ...]
+"""
+
+import sys
+
+import numpy as np
+
+from benchmarks.bench_rfm import timed
+from benchmarks.bench_varejo_cube import make_retail_data
+from utils.discounts import discount_sweep, sorted_sales
+
+THRESHOLDS = np.linspace(500, 2000, 101)
+RATES = np.arange(5, 26) / 100
+
+
+def per_scenario(values):
+    revenue = np.empty((len(THRESHOLDS), len(RATES)))
+    for i, threshold in enumerate(THRESHOLDS):
+        for j, rate in enumerate(RATES):
+            revenue[i, j] = np.where(
+                values > threshold, values * (1 - rate), values
+            ).sum()
+    return revenue
+
+
+def sweep(values):
+    return discount_sweep(*sorted_sales(values), THRESHOLDS, RATES)
+
+
+def main(sizes):
+    scenarios = len(THRESHOLDS) * len(RATES)
+    print(
+        f"{'linhas':>10} {'cenários':>9} {'por cenário (ms)':>17} "
+        f"{'varredura (ms)':>15} {'ganho':>7}"
+    )
+    for n in sizes:
+        values = make_retail_data(n)["Valor_Venda"].to_numpy(dtype=np.float64)
+        expected, t_loop = timed(per_scenario, values)
+        result, t_sweep = timed(sweep, values)
+        assert np.allclose(result["Receita"].to_numpy(), expected.ravel())
+        print(
+            f"{n:>10} {scenarios:>9} {t_loop * 1000:17.1f} "
+            f"{t_sweep * 1000:15.1f} {t_loop / t_sweep:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -1,9 +1,25 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from utils.load_file import load_dataset
-from utils.ui import setup_sidebar, add_back_to_top
-from utils.visualizations import plot_bar, plot_boxplot, plot_histogram
+from utils.load_file import (
+    cache_shared,
+    dataset_version,
+    is_dataset_ready,
+    load_dataset,
+    load_datasets_async,
+)
+from utils.aggregates import groupby_agg
+from utils.pareto import PARETO_THRESHOLD, pareto_analysis, top_k_indices
+from utils.rfm import (
+    MONETARY_COLS,
+    SEGMENT_ORDER,
+    compute_rfm,
+    monthly_rfm_snapshots,
+    segment_migrations,
+)
+from utils.segment_rules import available_rule_sets, score_rule_sets
+from utils.ui import setup_sidebar, add_back_to_top, lazy_tabs
+from utils.visualizations import plot_bar, plot_boxplot, plot_histogram, plot_scatter
 
 st.set_page_config(page_title="Segmentação RFM", page_icon="👥", layout="wide")
 
@@ -14,27 +30,6 @@ st.title("👥 Segmentação de Clientes com RFM")
 
 
 # --- Constants ---
-MONETARY_COLS = [
-    "total_vinho",
-    "total_frutas",
-    "total_carnes",
-    "total_peixes",
-    "total_doces",
-    "total_outros",
-]
-
-# Order for visualization (Best to Worst)
-SEGMENT_ORDER = [
-    "Campeões",
-    "Leais",
-    "Potenciais Leais",
-    "Novos",
-    "Promissores",
-    "Precisam de Atenção",
-    "Em Risco",
-    "Hibernando",
-]
-
 # Consistent Colors for Segments
 SEGMENT_COLORS = {
     "Campeões": "#28A745",  # Green
@@ -49,110 +44,79 @@ SEGMENT_COLORS = {
 
 
 # --- Data Loading ---
-@st.cache_data
-def load_and_merge_data():
-    try:
-        df_clientes = load_dataset("mercado_clientes_pt.xlsx")
-        df_resumo = load_dataset("mercado_resumo_compras_pt.xlsx")
-        df_transacoes = load_dataset("mercado_transacoes_pt.xlsx")
+FILE_CLIENTES = "mercado_clientes_pt.xlsx"
+FILE_RESUMO = "mercado_resumo_compras_pt.xlsx"
+FILE_TRANSACOES = "mercado_transacoes_pt.xlsx"
 
-        df = pd.merge(df_clientes, df_resumo, on="id_cliente", how="left")
-
-        return df, df_transacoes, df_clientes, df_resumo
-    except Exception as e:
-        st.error(f"Erro ao carregar dados: {e}")
-        return None, None
-
-
-df, df_transacoes, df_clientes, df_resumo = load_and_merge_data()
-
-
-def get_segment(r, f):
-    # Expanded logic to address feedback about unbalanced "Regular" group
-    # 5 is Best (Recent, High Freq)
-    if r >= 5 and f >= 5:
-        return "Campeões"
-    elif r >= 4 and f >= 4:
-        return "Leais"
-    elif r >= 4 and f >= 2:
-        return "Potenciais Leais"
-    elif r >= 4 and f <= 1:
-        return "Novos"
-    elif r >= 3 and f >= 3:
-        return "Promissores"
-    elif r >= 3 and f <= 2:
-        return "Precisam de Atenção"
-    elif r >= 2 and f >= 2:
-        return "Em Risco"
-    else:
-        return "Hibernando"
+# The three workbooks load concurrently; the overview renders the client
+# metrics while the transactions are still being read
+load_datasets_async([FILE_CLIENTES, FILE_RESUMO, FILE_TRANSACOES])
 
 
-@st.cache_data
-def generate_rfm_data(df_transacoes, df_merged):
-    # --- Pre-processing Transações ---
-    # Ensure dates
-    if "data_transacao" in df_transacoes.columns:
-        df_transacoes["data_transacao"] = pd.to_datetime(
-            df_transacoes["data_transacao"]
-        )
+@cache_shared
+def load_and_merge_data(versions):
+    # `versions` only keys the shared cache to the current source files
+    df_clientes = load_dataset(FILE_CLIENTES)
+    df_resumo = load_dataset(FILE_RESUMO)
 
-    # 1. Calculate Recency & Frequency (from Transactions)
-    reference_date = df_transacoes["data_transacao"].max() + pd.Timedelta(days=1)
+    df = pd.merge(df_clientes, df_resumo, on="id_cliente", how="left")
 
-    rf_metrics = (
-        df_transacoes.groupby("id_cliente")
-        .agg(
-            {
-                "data_transacao": lambda x: (reference_date - x.max()).days,
-                "id_transacao": "count",
-            }
-        )
-        .reset_index()
-    )
+    return df, df_clientes, df_resumo
 
-    rf_metrics.columns = ["id_cliente", "Recency", "Frequency"]
 
-    # 2. Calculate Monetary (from Merged Summary Data)
-    # Check if columns exist in df_merged, default to 0 if not
-    for col in MONETARY_COLS:
-        if col not in df_merged.columns:
-            df_merged[col] = 0
+def load_transactions():
+    try:
+        if is_dataset_ready(FILE_TRANSACOES):
+            return load_dataset(FILE_TRANSACOES)
+        with st.spinner("Carregando transações..."):
+            return load_dataset(FILE_TRANSACOES)
+    except Exception as e:
+        st.error(f"Erro ao carregar dados: {e}")
+        st.stop()
 
-    df_merged["Monetary"] = df_merged[MONETARY_COLS].sum(axis=1)
 
-    # 3. Merge R, F, M
-    # Use inner merge to only score customers who have transactions AND summary data
-    # Or left merge to keep all transaction customers?
-    # Usually we want RFM for active customers.
-    rfm = pd.merge(
-        rf_metrics, df_merged[["id_cliente", "Monetary"]], on="id_cliente", how="left"
+try:
+    df, df_clientes, df_resumo = load_and_merge_data(
+        (dataset_version(FILE_CLIENTES), dataset_version(FILE_RESUMO))
     )
-    rfm["Monetary"] = rfm["Monetary"].fillna(0)
+except Exception as e:
+    st.error(f"Erro ao carregar dados: {e}")
+    st.stop()
 
-    # --- Scoring (Quintiles 1-5) ---
-    rfm["R_Score"] = pd.qcut(rfm["Recency"], 5, labels=[5, 4, 3, 2, 1])
-    rfm["F_Score"] = pd.qcut(
-        rfm["Frequency"].rank(method="first"), 5, labels=[1, 2, 3, 4, 5]
-    )
-    rfm["M_Score"] = pd.qcut(rfm["Monetary"], 5, labels=[1, 2, 3, 4, 5])
 
-    rfm["RFM_Score"] = rfm["R_Score"].astype(str) + rfm["F_Score"].astype(str)
+@cache_shared
+def generate_rfm_data(df_transacoes, df_merged):
+    # Vectorized engine (utils.rfm): native groupby for Recency/Frequency,
+    # pd.qcut quintiles and a precomputed (R, F) -> segment lookup table
+    return compute_rfm(df_transacoes, df_merged)
+
 
-    # --- Segment Map ---
-    rfm["Segment"] = rfm.apply(
-        lambda row: get_segment(int(row["R_Score"]), int(row["F_Score"])), axis=1
-    )
+@cache_shared
+def generate_pareto_data(rfm):
+    # Uma ordenação + soma acumulada sobre Monetary (utils.pareto)
+    customers, curve, summary = pareto_analysis(rfm["Monetary"])
+    return rfm.join(customers), curve, summary
 
-    return rfm
 
+@cache_shared
+def generate_rfm_migrations(df_transacoes, df_merged):
+    # Snapshots mensais numa única passada (RFMStore) + matrizes de transição
+    snapshots, report = monthly_rfm_snapshots(df_transacoes, df_merged)
+    return segment_migrations(snapshots), report
 
-# --- Tabs ---
-tab_overview, tab_rfm, tab_analysis, tab_results = st.tabs(
-    ["Visão Geral", "Segmentação RFM", "Análise Detalhada", "Conclusões e Insights"]
+
+# Identifies rfm's content for the shared aggregations (utils.aggregates)
+rfm_version = "rfm-" + "-".join(
+    dataset_version(f) for f in (FILE_CLIENTES, FILE_RESUMO, FILE_TRANSACOES)
 )
 
-with tab_overview:
+# --- Seções (só a selecionada é executada a cada interação) ---
+section = lazy_tabs(
+    ["Visão Geral", "Segmentação RFM", "Análise Detalhada", "Conclusões e Insights"],
+    key="secao_rfm",
+)
+
+if section == "Visão Geral":
     st.markdown(
         """
         O Mercado atua em um setor altamente competitivo e enfrenta mudanças no comportamento dos consumidores. A fidelização de clientes tem se tornado cada vez mais desafiadora.
@@ -163,7 +127,6 @@ with tab_overview:
 
     col1, col2, col3 = st.columns(3)
     col1.metric("Total de Clientes", df.shape[0])
-    col2.metric("Clientes com Transações", df_transacoes["id_cliente"].nunique())
 
     total_sales = 0
     available_cols = [c for c in MONETARY_COLS if c in df.columns]
@@ -172,6 +135,11 @@ with tab_overview:
 
     col3.metric("Total de Vendas", f"R$ {total_sales:,.2f}")
 
+    # Only this metric depends on the transactions workbook
+    with col2:
+        df_transacoes = load_transactions()
+        st.metric("Clientes com Transações", df_transacoes["id_cliente"].nunique())
+
     st.subheader("Estrutura dos Arquivos")
 
     col_a, col_b, col_c = st.columns(3)
@@ -191,7 +159,7 @@ with tab_overview:
     st.subheader("Amostra dos Dados Unificados")
     st.dataframe(df.head(), use_container_width=True)
 
-with tab_rfm:
+elif section == "Segmentação RFM":
     st.header("Análise RFM (Recência, Frequência, Valor)")
     st.expander("Metodologia RFM", expanded=False).markdown(
         """
@@ -202,6 +170,7 @@ with tab_rfm:
     """
     )
 
+    df_transacoes = load_transactions()
     rfm = generate_rfm_data(df_transacoes, df)
 
     st.subheader("Distribuição dos Segmentos")
@@ -233,10 +202,12 @@ with tab_rfm:
         show_legend=False,
         height=450,
         color_map=SEGMENT_COLORS,
+        version=rfm_version,
     )
 
     st.subheader("Matriz RF (Recência x Frequência)")
-    fig_scatter = px.scatter(
+    # Acima de SCATTER_MAX_POINTS clientes o gráfico passa a ser agregado em grade
+    plot_scatter(
         rfm,
         x="Recency",
         y="Frequency",
@@ -244,24 +215,40 @@ with tab_rfm:
         size="Monetary",
         hover_data=["id_cliente"],
         title="Matriz RF (Tamanho = Valor Monetário)",
-        color_discrete_map=SEGMENT_COLORS,
-        labels={"Recency": "Recência (Dias)", "Frequency": "Frequência (Vezes)"},
+        color_map=SEGMENT_COLORS,
+        labels={
+            "Recency": "Recência (Dias)",
+            "Frequency": "Frequência (Vezes)",
+            "Monetary": "Valor Monetário (R$)",
+        },
+        version=rfm_version,
     )
-    st.plotly_chart(fig_scatter, use_container_width=True)
 
     st.subheader("Detalhes dos Grupos")
 
-    # Group metrics by Segment
-    rfm_summary = (
-        rfm.groupby("Segment")[["Recency", "Frequency", "Monetary"]]
-        .mean()
-        .reset_index()
+    # Group metrics and count of customers per Segment (query backend)
+    rfm_summary = groupby_agg(
+        rfm,
+        rfm_version,
+        "Segment",
+        {
+            "Recency": ("Recency", "mean"),
+            "Frequency": ("Frequency", "mean"),
+            "Monetary": ("Monetary", "mean"),
+            "Count": ("Segment", "size"),
+        },
     )
 
-    # Add Count of customers per segment
-    counts = rfm["Segment"].value_counts().reset_index()
-    counts.columns = ["Segment", "Count"]
-    rfm_summary = rfm_summary.merge(counts, on="Segment")
+    # Pareto: share of each segment in the group reaching 80% of revenue
+    rfm_pareto, pareto_curve, pareto_summary = generate_pareto_data(rfm)
+    pareto_by_segment = (
+        rfm_pareto.groupby("Segment", observed=True)
+        .agg(Pareto=("Pareto", "mean"), Revenue=("Monetary", "sum"))
+        .reset_index()
+    )
+    pareto_by_segment["Pareto"] *= 100
+    pareto_by_segment["Revenue"] *= 100 / max(pareto_summary["total"], 1)
+    rfm_summary = rfm_summary.merge(pareto_by_segment, on="Segment")
 
     # Order by Segment Quality
     rfm_summary["Segment"] = pd.Categorical(
@@ -276,6 +263,8 @@ with tab_rfm:
         "Frequência Média",
         "Valor Monetário Médio (R$)",
         "Qtd Clientes",
+        f"Clientes no Grupo {PARETO_THRESHOLD:.0%} (%)",
+        "Participação na Receita (%)",
     ]
 
     st.dataframe(
@@ -284,15 +273,102 @@ with tab_rfm:
                 "Recência Média (Dias)": "{:.1f}",
                 "Frequência Média": "{:.1f}",
                 "Valor Monetário Médio (R$)": "R$ {:.2f}",
+                f"Clientes no Grupo {PARETO_THRESHOLD:.0%} (%)": "{:.1f}",
+                "Participação na Receita (%)": "{:.1f}",
+            }
+        ),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    st.subheader("Análise de Pareto (80/20)")
+
+    col_p1, col_p2, col_p3 = st.columns(3)
+    col_p1.metric(
+        f"Clientes que geram {PARETO_THRESHOLD:.0%} da receita",
+        f"{pareto_summary['share_clientes_limiar']:.1%}",
+    )
+    col_p2.metric(
+        "Qtd. de Clientes no Grupo", f"{int(pareto_summary['clientes_limiar']):,}"
+    )
+    col_p3.metric(
+        "Receita dos 20% Maiores Clientes",
+        f"{pareto_summary['share_receita_top20']:.1%}",
+    )
+
+    fig_pareto = px.line(
+        pareto_curve,
+        x="Clientes (%)",
+        y="Receita (%)",
+        title="Curva de Pareto (Receita Acumulada)",
+    )
+    fig_pareto.add_hline(y=PARETO_THRESHOLD * 100, line_dash="dash")
+    fig_pareto.add_vline(
+        x=pareto_summary["share_clientes_limiar"] * 100, line_dash="dash"
+    )
+    st.plotly_chart(fig_pareto, use_container_width=True)
+
+    top_k = st.slider("Maiores clientes por valor", 5, 100, 10, step=5)
+    top_customers = rfm_pareto.iloc[top_k_indices(rfm_pareto["Monetary"], top_k)]
+    st.dataframe(
+        top_customers[["id_cliente", "Segment", "Monetary", "Receita_Acumulada"]]
+        .rename(
+            columns={
+                "id_cliente": "Cliente",
+                "Segment": "Segmento",
+                "Monetary": "Valor Monetário (R$)",
+                "Receita_Acumulada": "Receita Acumulada (%)",
             }
+        )
+        .style.format(
+            {"Valor Monetário (R$)": "R$ {:.2f}", "Receita Acumulada (%)": "{:.1%}"}
         ),
         use_container_width=True,
         hide_index=True,
     )
 
-with tab_analysis:
+    with st.expander("Comparar Regras de Segmentação"):
+        st.markdown(
+            "Conjuntos de regras definidos em `utils/rules/` (JSON ou YAML), "
+            "aplicados lado a lado sobre os mesmos scores R/F/M."
+        )
+        rule_sets, rule_errors = available_rule_sets()
+        for error in rule_errors:
+            st.warning(f"Regras ignoradas — {error}")
+
+        selected_rules = st.multiselect(
+            "Conjuntos de regras:", list(rule_sets), default=list(rule_sets)
+        )
+        if selected_rules:
+            segments_by_rules = score_rule_sets(
+                rfm, {name: rule_sets[name] for name in selected_rules}
+            )
+            rule_counts = pd.concat(
+                {
+                    name: segments_by_rules[name].value_counts(sort=False)
+                    for name in selected_rules
+                },
+                axis=1,
+            ).fillna(0)
+            rule_counts.index.name = "Segmento"
+            st.dataframe(rule_counts.astype(int), use_container_width=True)
+
+            for name in selected_rules:
+                rule_set = rule_sets[name]
+                agreement = (
+                    segments_by_rules[name].astype(str) == rfm["Segment"].astype(str)
+                ).mean()
+                st.caption(
+                    f"**{name}** — {rule_set.description} "
+                    f"Concordância com a segmentação atual: {agreement:.1%}."
+                )
+
+elif section == "Análise Detalhada":
     st.header("Análise Detalhada dos Segmentos")
 
+    df_transacoes = load_transactions()
+    rfm = generate_rfm_data(df_transacoes, df)
+
     plot_boxplot(
         rfm,
         x="Segment",
@@ -301,6 +377,7 @@ with tab_analysis:
         title="Distribuição de Recência por Segmento",
         color_map=SEGMENT_COLORS,
         labels={"Recency": "Recência (Dias)", "Segment": "Segmento"},
+        version=rfm_version,
     )
 
     plot_boxplot(
@@ -311,6 +388,7 @@ with tab_analysis:
         title="Distribuição de Frequência por Segmento",
         color_map=SEGMENT_COLORS,
         labels={"Frequency": "Frequência (Vezes)", "Segment": "Segmento"},
+        version=rfm_version,
     )
 
     plot_boxplot(
@@ -321,8 +399,54 @@ with tab_analysis:
         title="Distribuição de Valor Monetário por Segmento",
         color_map=SEGMENT_COLORS,
         labels={"Monetary": "Valor Monetário (R$)", "Segment": "Segmento"},
+        version=rfm_version,
     )
 
+    st.subheader("Migração entre Segmentos")
+    migrations, snapshot_report = generate_rfm_migrations(df_transacoes, df)
+    skipped = snapshot_report.loc[~snapshot_report["Pontuado"], "Snapshot"]
+    if len(skipped):
+        st.caption(
+            "Meses sem pontuação (poucos clientes para os quintis): "
+            + ", ".join(f"{m:%Y/%m}" for m in skipped)
+            + ". Transições que atravessam esses meses não são exibidas."
+        )
+
+    if migrations:
+        month = st.select_slider(
+            "Mês de referência (comparado ao mês anterior):",
+            options=list(migrations),
+            value=list(migrations)[-1],
+            format_func=lambda m: m.strftime("%Y/%m"),
+        )
+        transitions = migrations[month]
+        # Percentual de cada segmento de origem que foi para cada destino
+        transitions_pct = transitions.div(
+            transitions.sum(axis=1).replace(0, 1), axis=0
+        ).mul(100)
+        fig_migration = px.imshow(
+            transitions_pct,
+            text_auto=".0f",
+            aspect="auto",
+            color_continuous_scale="Blues",
+            labels={"x": "Para", "y": "De", "color": "% da origem"},
+            title=f"Transições de Segmento até {month:%Y/%m} (% da origem)",
+        )
+        fig_migration.update_layout(height=500)
+        st.plotly_chart(fig_migration, use_container_width=True)
+
+        with st.expander("Contagens e tempo de cálculo por snapshot"):
+            st.dataframe(transitions, use_container_width=True)
+            st.dataframe(
+                snapshot_report.style.format(
+                    {"Snapshot": "{:%Y/%m}", "Tempo (ms)": "{:.1f}"}
+                ),
+                use_container_width=True,
+                hide_index=True,
+            )
+    else:
+        st.info("Histórico insuficiente para comparar meses.")
+
     # Histogram of Monetary Value (Log scale maybe?)
     st.subheader("Distribuição de Valor Monetário (Geral)")
     plot_histogram(
@@ -331,10 +455,11 @@ with tab_analysis:
         title="Histograma de Valor Monetário",
         labels={"Monetary": "Valor Monetário (R$)", "count": "Quantidade"},
         color_map=SEGMENT_COLORS,
+        version=rfm_version,
     )
 
 
-with tab_results:
+elif section == "Conclusões e Insights":
     st.header("Conclusões e Insights Estratégicos")
 
     col1, col2 = st.columns(2)
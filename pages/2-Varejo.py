@@ -1,13 +1,26 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import numpy as np
-from utils.load_file import load_dataset
-from utils.ui import setup_sidebar, add_back_to_top
+import plotly.express as px
+from utils.aggregates import cached_aggregate
+from utils.cube import build_cube, hierarchy, rollup, totals
+from utils.dates import add_date_dimension
+from utils.discounts import discount_sweep, sorted_sales
+from utils.load_file import cache_shared
+from utils.pipeline import pipeline_version, run_pipeline
+from utils.query import group_aggregate
+from utils.ui import (
+    setup_sidebar,
+    add_back_to_top,
+    lazy_expander,
+    lazy_tabs,
+    show_pipeline_report,
+)
 from utils.visualizations import (
     show_univariate_grid,
     plot_histogram,
     plot_bar,
+    plot_sunburst,
     COLOR_PALETTE,
 )
 
@@ -18,38 +31,95 @@ add_back_to_top()
 
 st.title("🛍️ Análise de Dados de Varejo")
 
-# Data Loading
+
+# --- Pré-processamento ---
+DATE_FORMAT = "%d/%m/%Y"
+
+
+def converter_datas(df):
+    # Datas em dd/mm/aaaa: formato fixo (sem inferência); Ano, Mes e Ano_Mes
+    # vêm do calendário das datas distintas, não linha a linha.
+    if "Data_Pedido" in df.columns:
+        df = add_date_dimension(df, "Data_Pedido", format=DATE_FORMAT)
+    return df
+
+
+def garantir_numericos(df):
+    for col in ["Valor_Venda"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+PIPELINE_STEPS = [
+    ("Converter datas", converter_datas),
+    ("Garantir tipos numéricos", garantir_numericos),
+]
+
+# Data Loading (executado uma vez por versão do dataset, não a cada interação)
 try:
-    df = load_dataset("retail.csv")
+    df, pipeline_report = run_pipeline("retail.csv", PIPELINE_STEPS)
 except Exception as e:
     st.error(f"Erro ao carregar dados: {e}")
     st.stop()
 
-# --- Pré-processamento ---
-# Converter datas
-if "Data_Pedido" in df.columns:
-    df["Data_Pedido"] = pd.to_datetime(
-        df["Data_Pedido"], dayfirst=True, errors="coerce"
+# Regra de desconto das perguntas 7 e 8
+DISCOUNT_THRESHOLD = 1000
+
+CUBE_DIMENSIONS = [
+    "Ano",
+    "Mes",
+    "Segmento",
+    "Pais",
+    "Estado",
+    "Cidade",
+    "Categoria",
+    "SubCategoria",
+]
+
+
+@cache_shared
+def build_sales_cube(version, _df):
+    # Cubo único de Valor_Venda (soma/contagem) para as 10 perguntas, mais a
+    # série diária da Q2, que fica abaixo da granularidade mensal do cubo.
+    # `version` identifica dataset + etapas do pipeline; `_df` não é hasheado.
+    cube = build_cube(
+        _df, CUBE_DIMENSIONS, "Valor_Venda", threshold=DISCOUNT_THRESHOLD
     )
-    df["Ano"] = df["Data_Pedido"].dt.year
-    df["Mes"] = df["Data_Pedido"].dt.month
-    df["Ano_Mes"] = df["Data_Pedido"].dt.strftime("%Y/%m")
+    daily = group_aggregate(
+        _df, version, "Data_Pedido", {"Valor_Venda": ("Valor_Venda", "sum")}
+    )
+    return cube, daily
+
+
+data_version = pipeline_version("retail.csv", PIPELINE_STEPS)
+cube, df_daily = build_sales_cube(data_version, df)
+
+
+def vendas_por(by, agg="sum", filters=None):
+    # Rollups do cubo memorizados entre reruns, sessões e widgets
+    return cached_aggregate(
+        data_version,
+        ("rollup", by, "Valor_Venda", agg, filters),
+        lambda: rollup(cube, by, "Valor_Venda", agg=agg, filters=filters),
+    )
+
+
+@cache_shared
+def ordenar_vendas(version, _df):
+    # Valor_Venda ordenado + somas prefixadas, base da simulação de descontos
+    return sorted_sales(_df["Valor_Venda"])
 
-# Garantir tipos numéricos
-numeric_cols = ["Valor_Venda"]
-for col in numeric_cols:
-    if col in df.columns:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
 
 # Colunas categóricas de interesse
 categorical_cols = ["Segmento", "Pais", "Cidade", "Estado", "Categoria", "SubCategoria"]
 
-# Tabs
-tab_overview, tab_univariate, tab_qa = st.tabs(
-    ["Visão Geral", "Análise Univariada", "Respostas de Negócio"]
+# Seções (só a selecionada é executada a cada interação)
+section = lazy_tabs(
+    ["Visão Geral", "Análise Univariada", "Respostas de Negócio"], key="secao_varejo"
 )
 
-with tab_overview:
+if section == "Visão Geral":
 
     # Sobre o dataset
     st.markdown(
@@ -70,7 +140,14 @@ with tab_overview:
     st.subheader("Informações Estatísticas")
     st.dataframe(df.describe(), use_container_width=True)
 
-with tab_univariate:
+    with st.expander("Etapas de pré-processamento"):
+        show_pipeline_report(pipeline_report)
+        st.caption(
+            f"Perguntas de negócio respondidas a partir de um cubo com {len(cube):,} "
+            f"células (de {len(df):,} linhas)."
+        )
+
+elif section == "Análise Univariada":
     st.header("Análise Univariada")
 
     numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
@@ -92,161 +169,257 @@ with tab_univariate:
             selected_col = st.selectbox("Selecione a coluna:", categorical_cols)
         title = f"Distribuição de {selected_col}"
 
-    plot_histogram(df, x=selected_col, color="Categoria", title=title)
+    plot_histogram(
+        df, x=selected_col, color="Categoria", title=title, version=data_version
+    )
 
     # Filtra colunas que realmente existem
     valid_num = [c for c in numeric_cols if c in df.columns]
     valid_cat = [c for c in categorical_cols if c in df.columns]
 
-    show_univariate_grid(df, valid_num, valid_cat)
+    with lazy_expander(
+        "Todas as distribuições", key="grade_univariada_varejo"
+    ) as show:
+        if show:
+            show_univariate_grid(df, valid_num, valid_cat, version=data_version)
 
-with tab_qa:
+elif section == "Respostas de Negócio":
     st.header("Perguntas de Negócio")
     st.markdown("Respondendo às 10 perguntas estratégicas sobre os dados.")
 
     # --- Q1 ---
-    with st.expander(
-        "1. Qual Cidade com Maior Valor de Venda de 'Office Supplies'?", expanded=True
-    ):
-        df_q1 = df[df["Categoria"] == "Office Supplies"]
-        if not df_q1.empty:
-            city_max_sales = df_q1.groupby("Cidade")["Valor_Venda"].sum().idxmax()
-            max_val = df_q1.groupby("Cidade")["Valor_Venda"].sum().max()
-            st.metric("Cidade Vencedora", city_max_sales, f"R$ {max_val:,.2f}")
-        else:
-            st.warning("Dados insuficientes para esta categoria.")
+    with lazy_expander(
+        "1. Qual Cidade com Maior Valor de Venda de 'Office Supplies'?",
+        expanded=True,
+        key="pergunta_1_varejo",
+    ) as show:
+        if show:
+            df_q1 = vendas_por(["Cidade"], filters={"Categoria": "Office Supplies"})
+            if not df_q1.empty:
+                best_city = df_q1.loc[df_q1["Valor_Venda"].idxmax()]
+                st.metric(
+                    "Cidade Vencedora",
+                    best_city["Cidade"],
+                    f"R$ {best_city['Valor_Venda']:,.2f}",
+                )
+            else:
+                st.warning("Dados insuficientes para esta categoria.")
 
     # --- Q2 ---
-    with st.expander("2. Qual o Total de Vendas Por Data do Pedido?", expanded=True):
-        if "Data_Pedido" in df.columns:
-            df_q2 = df.groupby("Data_Pedido")["Valor_Venda"].sum().reset_index()
-            fig_q2 = px.line(
-                df_q2, x="Data_Pedido", y="Valor_Venda", title="Tendência de Vendas"
-            )
-            fig_q2.update_traces(line_color=COLOR_PALETTE[0])
-            st.plotly_chart(fig_q2, use_container_width=True)
+    with lazy_expander(
+        "2. Qual o Total de Vendas Por Data do Pedido?",
+        expanded=True,
+        key="pergunta_2_varejo",
+    ) as show:
+        if show:
+            if "Data_Pedido" in df.columns:
+                fig_q2 = px.line(
+                    df_daily,
+                    x="Data_Pedido",
+                    y="Valor_Venda",
+                    title="Tendência de Vendas",
+                )
+                fig_q2.update_traces(line_color=COLOR_PALETTE[0])
+                st.plotly_chart(fig_q2, use_container_width=True)
 
     # --- Q3 ---
-    with st.expander("3. Qual o Total de Vendas por Estado?"):
-        df_q3 = (
-            df.groupby("Estado")["Valor_Venda"]
-            .sum()
-            .reset_index()
-            .sort_values("Valor_Venda", ascending=False)
-        )
-        fig_q3 = px.bar(
-            df_q3,
-            x="Estado",
-            y="Valor_Venda",
-            color="Estado",
-            title="Vendas por Estado",
-        )
-        fig_q3.update_layout(showlegend=False)
-        st.plotly_chart(fig_q3, use_container_width=True)
+    with lazy_expander(
+        "3. Qual o Total de Vendas por Estado?", key="pergunta_3_varejo"
+    ) as show:
+        if show:
+            df_q3 = vendas_por(["Estado"]).sort_values(
+                "Valor_Venda", ascending=False
+            )
+            fig_q3 = px.bar(
+                df_q3,
+                x="Estado",
+                y="Valor_Venda",
+                color="Estado",
+                title="Vendas por Estado",
+            )
+            fig_q3.update_layout(showlegend=False)
+            st.plotly_chart(fig_q3, use_container_width=True)
 
     # --- Q4 ---
-    with st.expander("4. Quais São as 10 Cidades com Maior Total de Vendas?"):
-        df_q4 = (
-            df.groupby("Cidade")["Valor_Venda"]
-            .sum()
-            .reset_index()
-            .nlargest(10, "Valor_Venda")
-        )
-        fig_q4 = px.bar(
-            df_q4, x="Cidade", y="Valor_Venda", color="Cidade", title="Top 10 Cidades"
-        )
-        fig_q4.update_layout(showlegend=False)
-        st.plotly_chart(fig_q4, use_container_width=True)
+    with lazy_expander(
+        "4. Quais São as 10 Cidades com Maior Total de Vendas?",
+        key="pergunta_4_varejo",
+    ) as show:
+        if show:
+            df_q4 = vendas_por(["Cidade"]).nlargest(10, "Valor_Venda")
+            fig_q4 = px.bar(
+                df_q4,
+                x="Cidade",
+                y="Valor_Venda",
+                color="Cidade",
+                title="Top 10 Cidades",
+            )
+            fig_q4.update_layout(showlegend=False)
+            st.plotly_chart(fig_q4, use_container_width=True)
 
     # --- Q5 ---
-    with st.expander("5. Qual Segmento Teve o Maior Total de Vendas?"):
-        df_q5 = (
-            df.groupby("Segmento")["Valor_Venda"]
-            .sum()
-            .reset_index()
-            .sort_values("Valor_Venda", ascending=False)
-        )
-        winner_segment = df_q5.iloc[0]["Segmento"]
-        winner_value = df_q5.iloc[0]["Valor_Venda"]
-        st.metric("Segmento Campeão", winner_segment, f"R$ {winner_value:,.2f}")
-        plot_bar(
-            df_q5,
-            x_col="Valor_Venda",
-            y_col="Segmento",
-            orientation="h",
-            color="Segmento",
-            title="Total de Vendas por Segmento",
-        )
-
-    # --- Q6 ---
-    with st.expander("6. Qual o Total de Vendas Por Segmento e Por Ano?"):
-        if "Ano" in df.columns:
-            df_q6 = df.groupby(["Ano", "Segmento"])["Valor_Venda"].sum().reset_index()
-            fig_q6 = px.bar(
-                df_q6,
-                x="Ano",
-                y="Valor_Venda",
+    with lazy_expander(
+        "5. Qual Segmento Teve o Maior Total de Vendas?", key="pergunta_5_varejo"
+    ) as show:
+        if show:
+            df_q5 = vendas_por(["Segmento"]).sort_values(
+                "Valor_Venda", ascending=False
+            )
+            winner_segment = df_q5.iloc[0]["Segmento"]
+            winner_value = df_q5.iloc[0]["Valor_Venda"]
+            st.metric("Segmento Campeão", winner_segment, f"R$ {winner_value:,.2f}")
+            plot_bar(
+                df_q5,
+                x_col="Valor_Venda",
+                y_col="Segmento",
+                orientation="h",
                 color="Segmento",
-                barmode="group",
-                title="Vendas por Ano e Segmento",
+                title="Total de Vendas por Segmento",
+                version=data_version,
             )
-            st.plotly_chart(fig_q6, use_container_width=True)
+
+    # --- Q6 ---
+    with lazy_expander(
+        "6. Qual o Total de Vendas Por Segmento e Por Ano?", key="pergunta_6_varejo"
+    ) as show:
+        if show:
+            if "Ano" in df.columns:
+                df_q6 = vendas_por(["Ano", "Segmento"])
+                fig_q6 = px.bar(
+                    df_q6,
+                    x="Ano",
+                    y="Valor_Venda",
+                    color="Segmento",
+                    barmode="group",
+                    title="Vendas por Ano e Segmento",
+                )
+                st.plotly_chart(fig_q6, use_container_width=True)
 
     # --- Q7 & Q8 ---
-    with st.expander("7 & 8. Simulação de Descontos"):
-        st.markdown(
-            "**Regra:** Se Valor > 1000, Desconto de 15%. Caso contrário, 10% (apenas para classificação)."
-        )
-        st.markdown(
-            "*Para o cálculo de média 'Depois', aplicou-se 15% apenas para vendas > 1000.*"
-        )
+    with lazy_expander(
+        "7 & 8. Simulação de Descontos", key="pergunta_7_8_varejo"
+    ) as show:
+        if show:
+            st.markdown(
+                "**Regra:** Se Valor > 1000, Desconto de 15%. Caso contrário, 10% (apenas para classificação)."
+            )
+            st.markdown(
+                "*Para o cálculo de média 'Depois', aplicou-se 15% apenas para vendas > 1000.*"
+            )
 
-        sales = df["Valor_Venda"]
-        count_15 = (sales > 1000).sum()
+            sales = totals(cube, "Valor_Venda")
+            count_15 = sales["qtd_acima"]
 
-        col_d1, col_d2, col_d3 = st.columns(3)
-        col_d1.metric("Qtd. Vendas c/ 15% Off", count_15)
+            col_d1, col_d2, col_d3 = st.columns(3)
+            col_d1.metric("Qtd. Vendas c/ 15% Off", count_15)
 
-        avg_before = sales.mean()
-        # Aplica 15% apenas onde > 1000, mantém o resto igual (conforme lógica legada para Q8)
-        sales_after = np.where(sales > 1000, sales * 0.85, sales)
-        avg_after = sales_after.mean()
+            avg_before = sales["soma"] / sales["qtd"]
+            # Aplica 15% apenas onde > 1000, mantém o resto igual (conforme lógica legada para Q8)
+            avg_after = (sales["soma"] - 0.15 * sales["soma_acima"]) / sales["qtd"]
 
-        col_d2.metric("Média Antes", f"R$ {avg_before:,.2f}")
-        col_d3.metric(
-            "Média Depois",
-            f"R$ {avg_after:,.2f}",
-            delta=f"{avg_after - avg_before:,.2f}",
-        )
+            col_d2.metric("Média Antes", f"R$ {avg_before:,.2f}")
+            col_d3.metric(
+                "Média Depois",
+                f"R$ {avg_after:,.2f}",
+                delta=f"{avg_after - avg_before:,.2f}",
+            )
 
-    # --- Q9 ---
-    with st.expander("9. Média de Vendas Por Segmento, Por Ano e Por Mês"):
-        if "Ano_Mes" in df.columns:
-            df_q9 = (
-                df.groupby(["Segmento", "Ano_Mes"])["Valor_Venda"].mean().reset_index()
-            )
-            fig_q9 = px.line(
-                df_q9,
-                x="Ano_Mes",
-                y="Valor_Venda",
-                color="Segmento",
-                title="Média Mensal por Segmento",
+            st.markdown("**Simulação de cenários**")
+            st.caption(
+                "Todas as combinações de limite e desconto calculadas de uma vez "
+                "sobre as vendas ordenadas (busca binária + somas acumuladas)."
+            )
+            col_s1, col_s2, col_s3 = st.columns(3)
+            limit_range = col_s1.slider(
+                "Faixa de limite (R$)", 0, 5000, (500, 2000), step=50
             )
-            st.plotly_chart(fig_q9, use_container_width=True)
+            rate_range = col_s2.slider("Faixa de desconto (%)", 1, 50, (5, 25))
+            indicator = col_s3.radio(
+                "Indicador",
+                ["Impacto na Receita", "Ticket Médio", "Pedidos Afetados"],
+            )
+
+            sorted_values, prefix = ordenar_vendas(data_version, df)
+            thresholds = np.linspace(*limit_range, 101)
+            rates = np.arange(rate_range[0], rate_range[1] + 1) / 100
+            df_sweep = discount_sweep(sorted_values, prefix, thresholds, rates)
+
+            grid = df_sweep.pivot(index="Desconto", columns="Limite", values=indicator)
+            fig_sweep = px.imshow(
+                grid.to_numpy(),
+                x=grid.columns,
+                y=grid.index * 100,
+                aspect="auto",
+                origin="lower",
+                # Impacto é sempre <= 0: mais escuro = maior perda de receita
+                color_continuous_scale=(
+                    "Reds_r" if indicator == "Impacto na Receita" else "Blues"
+                ),
+                labels={"x": "Limite (R$)", "y": "Desconto (%)", "color": indicator},
+                title=f"{indicator} por Limite e Desconto ({len(df_sweep):,} cenários)",
+            )
+            st.plotly_chart(fig_sweep, use_container_width=True)
+
+    # --- Q9 ---
+    with lazy_expander(
+        "9. Média de Vendas Por Segmento, Por Ano e Por Mês", key="pergunta_9_varejo"
+    ) as show:
+        if show:
+            if "Ano_Mes" in df.columns:
+                df_q9 = vendas_por(["Segmento", "Ano", "Mes"], agg="mean")
+                df_q9.insert(
+                    1,
+                    "Ano_Mes",
+                    df_q9["Ano"].astype(int).astype(str)
+                    + "/"
+                    + df_q9["Mes"].astype(int).astype(str).str.zfill(2),
+                )
+                df_q9 = df_q9.drop(columns=["Ano", "Mes"]).sort_values(
+                    ["Segmento", "Ano_Mes"], ignore_index=True
+                )
+                fig_q9 = px.line(
+                    df_q9,
+                    x="Ano_Mes",
+                    y="Valor_Venda",
+                    color="Segmento",
+                    title="Média Mensal por Segmento",
+                )
+                st.plotly_chart(fig_q9, use_container_width=True)
 
     # --- Q10 ---
-    with st.expander("10. Total por Categoria e Top 12 SubCategorias"):
-        st.markdown("Visualização hierárquica das vendas (Sunburst Chart).")
-        # Top 12 Subcategorias
-        top12_subs = df.groupby("SubCategoria")["Valor_Venda"].sum().nlargest(12).index
-        df_top12 = df[df["SubCategoria"].isin(top12_subs)]
-
-        fig_q10 = px.sunburst(
-            df_top12,
-            path=["Categoria", "SubCategoria"],
-            values="Valor_Venda",
-            color="Categoria",
-            color_discrete_sequence=COLOR_PALETTE,
-        )
-        fig_q10.update_layout(height=600)
-        st.plotly_chart(fig_q10, use_container_width=True)
+    with lazy_expander(
+        "10. Total por Categoria e Top 12 SubCategorias", key="pergunta_10_varejo"
+    ) as show:
+        if show:
+            st.markdown("Visualização hierárquica das vendas (Sunburst Chart).")
+            # Top 12 Subcategorias; o plotly recebe só os nós da árvore
+            df_top12 = vendas_por(["Categoria", "SubCategoria"]).nlargest(
+                12, "Valor_Venda"
+            )
+            nodes_q10 = hierarchy(
+                df_top12, ["Categoria", "SubCategoria"], "Valor_Venda"
+            )
+            plot_sunburst(
+                nodes_q10,
+                values="Valor_Venda",
+                color="Categoria",
+                version=f"{data_version}-top12",
+            )
+
+            st.markdown("**Vendas por Local**")
+            top_n = st.slider("Top N por nível (demais em 'Outros')", 3, 20, 8)
+            local_path = ["Pais", "Estado", "Cidade"]
+            nodes_local = cached_aggregate(
+                data_version,
+                ("hierarquia", local_path, "Valor_Venda", top_n),
+                lambda: hierarchy(
+                    vendas_por(local_path), local_path, "Valor_Venda", top_n=top_n
+                ),
+            )
+            plot_sunburst(
+                nodes_local,
+                values="Valor_Venda",
+                color="Pais",
+                version=f"{data_version}-top{top_n}",
+            )
+            st.caption(f"{len(nodes_local):,} nós enviados ao gráfico.")
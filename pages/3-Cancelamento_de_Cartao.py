@@ -1,6 +1,12 @@
 import streamlit as st
-from utils.load_file import load_dataset
-from utils.ui import setup_sidebar, add_back_to_top
+from utils.pipeline import pipeline_version, run_pipeline
+from utils.ui import (
+    setup_sidebar,
+    add_back_to_top,
+    lazy_expander,
+    lazy_tabs,
+    show_pipeline_report,
+)
 from utils.visualizations import (
     plot_pie,
     plot_histogram,
@@ -19,32 +25,43 @@ add_back_to_top()
 
 st.title("💳 Análise de Cancelamento de Cartão de Crédito")
 
-# Data Loading
+
+# Cleaning
+def remover_colunas(df):
+    cols_to_drop = ["CLIENTNUM"] + [c for c in df.columns if "Naive_Bayes" in c]
+    return df.drop(columns=cols_to_drop, errors="ignore")
+
+
+PIPELINE_STEPS = [("Remover colunas irrelevantes", remover_colunas)]
+
+# Data Loading (limpeza executada uma vez por versão do dataset)
 try:
-    df = load_dataset("bank_credit_card_cancellation.csv")
+    df, pipeline_report = run_pipeline(
+        "bank_credit_card_cancellation.csv", PIPELINE_STEPS
+    )
 except Exception as e:
     st.error(f"Erro ao carregar dados: {e}")
     st.stop()
 
-# Cleaning
-cols_to_drop = ["CLIENTNUM"] + [c for c in df.columns if "Naive_Bayes" in c]
-df = df.drop(columns=cols_to_drop, errors="ignore")
-
-# Tabs
-tab_overview, tab_clean, tab_metrics, tab_univariate, tab_heat_map, tab_bivariate = (
-    st.tabs(
-        [
-            "Visão Geral",
-            "Metodologia de Limpeza",
-            "Métricas",
-            "Análise Univariada",
-            "Análise de Correlação",
-            "Análise Bivariada",
-        ]
-    )
+data_version = pipeline_version("bank_credit_card_cancellation.csv", PIPELINE_STEPS)
+
+numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
+categorical_cols = df.select_dtypes(exclude=["number"]).columns.tolist()
+
+# Seções (só a selecionada é executada a cada interação)
+section = lazy_tabs(
+    [
+        "Visão Geral",
+        "Metodologia de Limpeza",
+        "Métricas",
+        "Análise Univariada",
+        "Análise de Correlação",
+        "Análise Bivariada",
+    ],
+    key="secao_cartao",
 )
 
-with tab_overview:
+if section == "Visão Geral":
     st.markdown(
         "Este conjunto de dados contém informações sobre clientes de cartão de crédito e se eles cancelaram ou não."
     )
@@ -63,7 +80,7 @@ with tab_overview:
     )
 
 
-with tab_clean:
+elif section == "Metodologia de Limpeza":
     st.header("Processo de Limpeza de Dados")
     st.markdown(
         """
@@ -85,13 +102,16 @@ df = df.drop(columns=cols_to_drop, errors='ignore')
         language="python",
     )
 
-with tab_metrics:
+    st.subheader("Etapas Executadas")
+    show_pipeline_report(pipeline_report)
+
+elif section == "Métricas":
     col1, col2 = st.columns(2)
     col1.header("Métricas")
     col1.metric("Total Clientes", df.shape[0])
     col1.metric("Total Colunas", df.shape[1])
     with col2:
-        plot_pie(df, names="Categoria", height=350)
+        plot_pie(df, names="Categoria", height=350, version=data_version)
 
     metrics_groups = {
         "Informação da Pessoa": [
@@ -123,12 +143,9 @@ with tab_metrics:
     show_grouped_metrics(df, metrics_groups)
 
 
-with tab_univariate:
+elif section == "Análise Univariada":
     st.header("Análise Univariada")
 
-    numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
-    categorical_cols = df.select_dtypes(exclude=["number"]).columns.tolist()
-
     col1, col2 = st.columns(2)
     with col1:
         col_type = st.radio(
@@ -142,15 +159,23 @@ with tab_univariate:
             selected_col = st.selectbox("Selecione a coluna:", categorical_cols)
         title = f"Distribuição de {selected_col}"
 
-    plot_histogram(df, x=selected_col, color="Categoria", title=title)
+    plot_histogram(
+        df, x=selected_col, color="Categoria", title=title, version=data_version
+    )
 
-    show_univariate_grid(df, numeric_cols, categorical_cols)
+    with lazy_expander(
+        "Todas as distribuições", key="grade_univariada_cartao"
+    ) as show:
+        if show:
+            show_univariate_grid(
+                df, numeric_cols, categorical_cols, version=data_version
+            )
 
-with tab_heat_map:
+elif section == "Análise de Correlação":
     st.header("Mapa de Calor de Correlação")
-    plot_heatmap(df, numeric_cols)
+    plot_heatmap(df, numeric_cols, version=data_version)
 
-with tab_bivariate:
+elif section == "Análise Bivariada":
     st.header("Análise Bivariada (Boxplots)")
     y_col = st.selectbox(
         "Selecione a variável numérica para comparar com Churn:", numeric_cols, index=0
@@ -161,6 +186,9 @@ with tab_bivariate:
         y=y_col,
         color="Categoria",
         title=f"{y_col} vs Status de Churn",
+        version=data_version,
     )
 
-    show_bivariate_grid(df, numeric_cols)
+    with lazy_expander("Todos os boxplots", key="grade_bivariada_cartao") as show:
+        if show:
+            show_bivariate_grid(df, numeric_cols, version=data_version)
@@ -1,8 +1,25 @@
 import streamlit as st
 import pandas as pd
-from utils.load_file import load_dataset
-from utils.ui import setup_sidebar, add_back_to_top
-from utils.visualizations import plot_bar
+from utils.aggregates import get_aggregate_stats, groupby_agg
+from utils.figures import get_figure_stats
+from utils.load_file import get_snapshot_stats
+from utils.pipeline import pipeline_version, run_pipeline
+from utils.ui import (
+    setup_sidebar,
+    add_back_to_top,
+    lazy_expander,
+    lazy_tabs,
+    show_aggregate_stats,
+    show_figure_stats,
+    show_snapshot_stats,
+    show_pipeline_report,
+)
+from utils.visualizations import (
+    bar_figure,
+    build_figures,
+    plot_bar,
+    show_figure_grid,
+)
 
 st.set_page_config(
     page_title="Cancelamento de Assinaturas", page_icon="🔄", layout="wide"
@@ -13,47 +30,71 @@ add_back_to_top()
 
 st.title("🔄 Análise de Cancelamento de Assinaturas")
 
-# Data Loading
-try:
-    df_raw = load_dataset("cancelamentos_servico.csv")
-except Exception as e:
-    st.error(f"Erro ao carregar dados: {e}")
-    st.stop()
 
 # --- Pre-processing ---
-df = df_raw.copy()
+def remover_colunas(df):
+    cols_to_drop = ["Unnamed: 0", "Codigo"]
+    return df.drop(columns=[c for c in cols_to_drop if c in df.columns])
 
-cols_to_drop = ["Unnamed: 0", "Codigo"]
-df = df.drop(columns=[c for c in cols_to_drop if c in df.columns], errors="ignore")
 
-rows_before = len(df)
-df = df.dropna()
-rows_after = len(df)
+def remover_nulos(df):
+    return df.dropna()
 
-if "Aposentado" in df.columns:
-    df["Aposentado"] = (
-        df["Aposentado"].astype(int).astype(str).map({"0": "Não", "1": "Sim"})
-    )
 
-    df["TotalGasto"] = pd.to_numeric(df["TotalGasto"], errors="coerce")
-    df = df.dropna(subset=["TotalGasto"])
+def converter_tipos(df):
+    if "Aposentado" in df.columns:
+        df["Aposentado"] = (
+            df["Aposentado"].astype(int).astype(str).map({"0": "Não", "1": "Sim"})
+        )
+
+        df["TotalGasto"] = pd.to_numeric(df["TotalGasto"], errors="coerce")
+        df = df.dropna(subset=["TotalGasto"])
+    return df
+
 
-if df["Churn"].dtype == "object":
-    df["Churn_Bin"] = df["Churn"].map({"Sim": 1, "Nao": 0})
-else:
-    df["Churn_Bin"] = df["Churn"]
+def binarizar_churn(df):
+    if df["Churn"].dtype == "object":
+        df["Churn_Bin"] = df["Churn"].map({"Sim": 1, "Nao": 0})
+    else:
+        df["Churn_Bin"] = df["Churn"]
+    return df
 
-# --- Tabs ---
-tab_overview, tab_clean, tab_analysis, tab_insights = st.tabs(
+
+PIPELINE_STEPS = [
+    ("Remover colunas", remover_colunas),
+    ("Remover nulos", remover_nulos),
+    ("Converter tipos", converter_tipos),
+    ("Binarizar churn", binarizar_churn),
+]
+
+# Data Loading (limpeza executada uma vez por versão do dataset)
+try:
+    df, pipeline_report = run_pipeline("cancelamentos_servico.csv", PIPELINE_STEPS)
+except Exception as e:
+    st.error(f"Erro ao carregar dados: {e}")
+    st.stop()
+
+rows_before, rows_after = pipeline_report["Linhas"].iloc[:2]
+data_version = pipeline_version("cancelamentos_servico.csv", PIPELINE_STEPS)
+
+CHURN_RATE = {"Churn_Bin": ("Churn_Bin", "mean")}
+
+total_customers = len(df)
+churn_count = df["Churn_Bin"].sum()
+churn_rate = churn_count / total_customers
+
+# --- Seções (só a selecionada é executada a cada interação) ---
+section = lazy_tabs(
     [
         "Visão Geral",
         "Metodologia de Limpeza",
         "Análise de Cancelamento",
         "Insights & Solução",
-    ]
+    ],
+    key="secao_assinatura",
 )
 
-with tab_overview:
+if section == "Visão Geral":
     st.markdown(
         """
         A perda de clientes (Churn) é um dos maiores desafios para empresas de receita recorrente. Neste estudo de caso, analisamos os dados de uma operadora de Telecom para identificar padrões de comportamento de clientes que cancelaram o serviço.
@@ -64,10 +105,6 @@ with tab_overview:
 
     # Key Metrics
     col1, col2, col3 = st.columns(3)
-    total_customers = len(df)
-    churn_count = df["Churn_Bin"].sum()
-    churn_rate = churn_count / total_customers
-
     col1.metric("Total de Clientes", total_customers)
     col2.metric("Cancelamentos", int(churn_count))
     col3.metric("Taxa de Churn Global", f"{churn_rate:.1%}", delta_color="inverse")
@@ -77,7 +114,7 @@ with tab_overview:
     st.dataframe(df.head(), use_container_width=True)
 
 
-with tab_clean:
+elif section == "Metodologia de Limpeza":
     st.header("Processo de Limpeza de Dados")
     st.markdown(
         """
@@ -116,10 +153,22 @@ df["Churn_Bin"] = df["Churn"].map({"Sim": 1, "Nao": 0})
             f"ℹ️ **Status da Limpeza**: {rows_before - rows_after} linhas foram removidas por conterem valores nulos."
         )
 
-with tab_analysis:
+    st.subheader("Etapas Executadas")
+    show_pipeline_report(pipeline_report)
+
+    with st.expander("Cache de agregações"):
+        show_aggregate_stats(get_aggregate_stats())
+
+    with st.expander("Cache de gráficos"):
+        show_figure_stats(get_figure_stats())
+
+    with st.expander("Snapshots dos datasets"):
+        show_snapshot_stats(get_snapshot_stats())
+
+elif section == "Análise de Cancelamento":
     st.header("Exploração dos Fatores de Cancelamento")
 
-    churn_by_contract = df.groupby("TipoContrato")["Churn_Bin"].mean().reset_index()
+    churn_by_contract = groupby_agg(df, data_version, "TipoContrato", CHURN_RATE)
     churn_by_contract["Churn Rate"] = churn_by_contract["Churn_Bin"]
     churn_by_contract = churn_by_contract.sort_values("Churn Rate", ascending=False)
 
@@ -137,6 +186,7 @@ with tab_analysis:
             },
             color="TipoContrato",
             show_legend=False,
+            version=data_version,
         )
     with col_info:
         st.info(
@@ -166,55 +216,37 @@ with tab_analysis:
     # Múltiplas Categorias (> 2 valores) -> 2 colunas (Grid maior)
     cols_multi = [c for c in explore_cols if df[c].nunique() > 2]
 
-    with st.container(border=True):
-
-        st.markdown("### Todos os Fatores")
-
-        if cols_multi:
-            cols2 = st.columns(2)
-            for i, selected_var in enumerate(cols_multi):
-                with cols2[i % 2]:
-                    churn_by_var = (
-                        df.groupby(selected_var)["Churn_Bin"].mean().reset_index()
-                    )
-                    churn_by_var = churn_by_var.sort_values(
-                        "Churn_Bin", ascending=False
-                    )
-
-                    plot_bar(
-                        churn_by_var,
-                        x_col=selected_var,
-                        y_col="Churn_Bin",
-                        title=f"{selected_var}",
-                        labels={"Churn_Bin": "Taxa", selected_var: ""},
-                        color=selected_var,
-                        height=300,
-                        show_legend=False,
-                    )
-
-        if cols_binary:
-            cols3 = st.columns(3)
-            for i, selected_var in enumerate(cols_binary):
-                with cols3[i % 3]:
-                    churn_by_var = (
-                        df.groupby(selected_var)["Churn_Bin"].mean().reset_index()
-                    )
-                    churn_by_var = churn_by_var.sort_values(
-                        "Churn_Bin", ascending=False
-                    )
-
-                    plot_bar(
-                        churn_by_var,
-                        x_col=selected_var,
-                        y_col="Churn_Bin",
-                        title=f"{selected_var}",
-                        labels={"Churn_Bin": "Taxa", selected_var: ""},
-                        color=selected_var,
-                        height=250,
-                        show_legend=False,
-                    )
-
-with tab_insights:
+    def fator_churn(selected_var, height):
+        # Executada nas threads da grade (build_figures): sem chamadas st.*
+        churn_by_var = groupby_agg(df, data_version, selected_var, CHURN_RATE)
+        churn_by_var = churn_by_var.sort_values("Churn_Bin", ascending=False)
+        return bar_figure(
+            churn_by_var,
+            x_col=selected_var,
+            y_col="Churn_Bin",
+            title=f"{selected_var}",
+            labels={"Churn_Bin": "Taxa", selected_var: ""},
+            color=selected_var,
+            height=height,
+            show_legend=False,
+            version=data_version,
+        )
+
+    with lazy_expander("Todos os Fatores", key="fatores_assinatura") as show:
+        if show:
+            if cols_multi:
+                show_figure_grid(
+                    build_figures(lambda var: fator_churn(var, 300), cols_multi),
+                    n_cols=2,
+                )
+
+            if cols_binary:
+                show_figure_grid(
+                    build_figures(lambda var: fator_churn(var, 250), cols_binary),
+                    n_cols=3,
+                )
+
+elif section == "Insights & Solução":
     st.header("Diagnóstico e Plano de Ação")
 
     col1_choice, col2_result = st.columns(2)
@@ -0,0 +1,28 @@
+import pandas as pd
+
+from utils import aggregates
+from utils.aggregates import cached_aggregate, clear_aggregates, get_aggregate_stats
+
+
+def test_stats_are_bounded_with_the_cache(monkeypatch):
+    clear_aggregates()
+    monkeypatch.setattr(aggregates, "STATS_MAX_KEYS", 10)
+    # ~1 KB budget: only a couple of frames stay cached
+    monkeypatch.setattr(aggregates, "AGGREGATE_CACHE_MB", 1 / 1024)
+    for i in range(100):
+        cached_aggregate("v", ("spec", i), lambda: pd.DataFrame({"x": range(50)}))
+
+    stats = get_aggregate_stats()
+    assert len(stats) == 10
+    # The most recent aggregations keep their counters
+    assert stats["Agregação"].iloc[-1] == repr(("spec", 99))
+    clear_aggregates()
+
+
+def test_cached_result_is_a_copy_on_write_view():
+    clear_aggregates()
+    first = cached_aggregate("v", "soma", lambda: pd.DataFrame({"x": [1, 2]}))
+    first["x"] = 0
+    second = cached_aggregate("v", "soma", lambda: pd.DataFrame({"x": [9, 9]}))
+    assert second["x"].tolist() == [1, 2]
+    clear_aggregates()
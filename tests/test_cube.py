@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.cube import build_cube, hierarchy, rollup, totals
+
+
+@pytest.fixture
+def sales():
+    rng = np.random.default_rng(0)
+    n = 2_000
+    return pd.DataFrame(
+        {
+            "Segmento": rng.choice(["Consumer", "Corporate", "Home Office"], n),
+            "Categoria": rng.choice(["Furniture", "Office Supplies", "Technology"], n),
+            "SubCategoria": rng.choice(list("abcdefgh"), n),
+            "Estado": rng.choice(["SP", "RJ", "MG", None], n),
+            "Valor_Venda": rng.gamma(2.0, 300.0, n),
+        }
+    )
+
+
+@pytest.fixture
+def cube(sales):
+    dims = ["Segmento", "Categoria", "SubCategoria", "Estado"]
+    return build_cube(sales, dims, "Valor_Venda", threshold=1000)
+
+
+@pytest.mark.parametrize("agg", ["sum", "count", "mean"])
+def test_rollup_matches_raw_groupby(sales, cube, agg):
+    expected = sales.groupby(["Segmento", "Categoria"])["Valor_Venda"].agg(agg)
+    result = rollup(cube, ["Segmento", "Categoria"], "Valor_Venda", agg=agg)
+    np.testing.assert_allclose(result["Valor_Venda"], expected.to_numpy())
+
+
+def test_filtered_rollup_and_totals(sales, cube):
+    office = sales[sales["Categoria"] == "Office Supplies"]
+    expected = office.groupby("Estado")["Valor_Venda"].sum()
+    result = rollup(
+        cube, ["Estado"], "Valor_Venda", filters={"Categoria": "Office Supplies"}
+    )
+    np.testing.assert_allclose(result["Valor_Venda"], expected.to_numpy())
+
+    # Rows with a missing Estado still count in the grand totals
+    above = sales["Valor_Venda"] > 1000
+    result = totals(cube, "Valor_Venda")
+    assert result["qtd"] == len(sales)
+    assert result["qtd_acima"] == above.sum()
+    assert result["soma"] == pytest.approx(sales["Valor_Venda"].sum())
+    assert result["soma_acima"] == pytest.approx(sales["Valor_Venda"][above].sum())
+
+
+def test_hierarchy_nodes_add_up_with_top_n(cube):
+    path = ["Categoria", "SubCategoria"]
+    leaves = rollup(cube, path, "Valor_Venda")
+    nodes = hierarchy(leaves, path, "Valor_Venda", top_n=[None, 3])
+
+    assert nodes["id"].is_unique
+    children = nodes[nodes["parent"] != ""]
+    assert children.groupby("parent").size().max() == 4
+    assert (children["label"] == "Outros").sum() == 3
+    roots = nodes[nodes["parent"] == ""].set_index("id")["Valor_Venda"]
+    np.testing.assert_allclose(
+        children.groupby("parent")["Valor_Venda"].sum()[roots.index], roots
+    )
+    assert roots.sum() == pytest.approx(leaves["Valor_Venda"].sum())
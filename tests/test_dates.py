@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_varejo_dates import check, row_wise
+from utils.dates import add_date_dimension
+
+
+@pytest.fixture
+def orders():
+    rng = np.random.default_rng(0)
+    days = pd.Timestamp("2015-01-03") + pd.to_timedelta(
+        rng.integers(0, 1_400, 5_000), unit="D"
+    )
+    return pd.DataFrame({"Data_Pedido": days.strftime("%d/%m/%Y")})
+
+
+@pytest.mark.parametrize("format", ["%d/%m/%Y", None])
+def test_matches_the_row_wise_step(orders, format):
+    expected = row_wise(orders)
+    result = add_date_dimension(orders.copy(), "Data_Pedido", format, dayfirst=True)
+    check(expected, result)
+    assert result["Ano_Mes"].cat.ordered
+
+
+def test_missing_and_unparseable_dates():
+    df = pd.DataFrame({"Data_Pedido": ["31/12/2016", None, "data?", "02/02/2017"]})
+    result = add_date_dimension(df, "Data_Pedido", format="%d/%m/%Y")
+
+    assert result["Data_Pedido"].isna().tolist() == [False, True, True, False]
+    assert result["Ano"].tolist() == [2016, pd.NA, pd.NA, 2017]
+    assert result["Mes"].tolist() == [12, pd.NA, pd.NA, 2]
+    assert list(result["Ano_Mes"].cat.categories) == ["2016/12", "2017/01", "2017/02"]
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from benchmarks.bench_varejo_discounts import RATES, THRESHOLDS, per_scenario, sweep
+from utils.discounts import discount_sweep, sorted_sales
+
+
+def test_sweep_matches_one_pass_per_scenario():
+    values = np.random.default_rng(0).gamma(2.0, 300.0, 2_000)
+    result = sweep(values)
+
+    np.testing.assert_allclose(result["Receita"], per_scenario(values).ravel())
+    expected_affected = [(values > t).sum() for t in THRESHOLDS]
+    assert result["Pedidos Afetados"].to_numpy()[:: len(RATES)].tolist() == (
+        expected_affected
+    )
+
+
+def test_fixed_rule_and_missing_values():
+    sales, prefix = sorted_sales([1500.0, np.nan, 200.0, 1000.0])
+    assert not sales.flags.writeable
+    row = discount_sweep(sales, prefix, [1000], [0.15]).iloc[0]
+
+    # 1000 is not above the threshold; the missing order is dropped
+    assert row["Pedidos Afetados"] == 1
+    assert row["Impacto na Receita"] == pytest.approx(-225.0)
+    assert row["Receita"] == pytest.approx(2475.0)
+    assert row["Ticket Médio"] == pytest.approx(825.0)
@@ -0,0 +1,52 @@
+import plotly.graph_objects as go
+import pytest
+
+from utils import figures
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(figures, "FIGURE_DIR", tmp_path)
+    figures.clear_figures()
+    yield
+    figures.clear_figures()
+
+
+def counting_build(calls):
+    def build():
+        calls.append(1)
+        return go.Figure(go.Bar(x=["a", "b"], y=[1, 2]))
+
+    return build
+
+
+def test_figure_built_once_per_version_and_spec():
+    calls = []
+    build = counting_build(calls)
+    first = figures.cached_figure("v1", "barras", ("x",), build)
+    again = figures.cached_figure("v1", "barras", ("x",), build)
+    figures.cached_figure("v2", "barras", ("x",), build)
+    figures.cached_figure("v1", "barras", ("y",), build)
+
+    assert len(calls) == 3
+    assert again.data == first.data
+    stats = figures.get_figure_stats().set_index("Gráfico").loc["barras"]
+    assert (stats["Memória"], stats["Falhas"]) == (1, 3)
+
+
+def test_without_version_nothing_is_cached():
+    calls = []
+    for _ in range(2):
+        figures.cached_figure(None, "barras", (), counting_build(calls))
+    assert len(calls) == 2
+
+
+def test_disk_tier_survives_the_memory_cache(monkeypatch):
+    monkeypatch.setattr(figures, "FIGURE_CACHE_DISK", True)
+    calls = []
+    figures.cached_figure("v1", "barras", (), counting_build(calls))
+    figures.clear_figures()
+    figures.cached_figure("v1", "barras", (), counting_build(calls))
+
+    assert len(calls) == 1
+    assert figures.get_figure_stats()["Disco"].tolist() == [1]
@@ -0,0 +1,113 @@
+import codecs
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from utils import load_file
+
+
+@pytest.fixture
+def latin1_csv(tmp_path, monkeypatch):
+    data_dir, snapshot_dir = tmp_path / "data", tmp_path / "snapshots"
+    data_dir.mkdir()
+    monkeypatch.setattr(load_file, "DATA_DIR", data_dir)
+    monkeypatch.setattr(load_file, "SNAPSHOT_DIR", snapshot_dir)
+    pd.DataFrame({"Educação": ["Pós", "Médio"], "Idade": [30, 40]}).to_csv(
+        data_dir / "dados.csv", index=False, encoding="latin-1"
+    )
+    return "dados.csv"
+
+
+def test_without_pyarrow_hashes_and_sniffs_once(latin1_csv, monkeypatch):
+    monkeypatch.setattr(load_file, "pyarrow", None)
+    calls = {"digest": 0, "sniff": 0}
+    digest, detect = load_file._file_digest, load_file._detect_encoding
+
+    def counting_digest(*args):
+        calls["digest"] += 1
+        return digest(*args)
+
+    def counting_detect(*args):
+        calls["sniff"] += 1
+        return detect(*args)
+
+    monkeypatch.setattr(load_file, "_file_digest", counting_digest)
+    monkeypatch.setattr(load_file, "_detect_encoding", counting_detect)
+
+    first = load_file.read_dataset(latin1_csv)
+    version = load_file.dataset_version(latin1_csv)
+    second = load_file.read_dataset(latin1_csv)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert list(first.columns) == ["Educação", "Idade"]
+    assert load_file.dataset_version(latin1_csv) == version
+    assert calls == {"digest": 1, "sniff": 1}
+    assert load_file.get_dataset_encoding(latin1_csv) == "latin-1"
+
+
+@pytest.mark.skipif(load_file.pyarrow is None, reason="snapshots precisam de pyarrow")
+def test_concurrent_loads_count_every_snapshot_hit(latin1_csv):
+    load_file.read_dataset(latin1_csv)
+    before = load_file.get_snapshot_stats()
+    with ThreadPoolExecutor(load_file.LOADER_THREADS) as pool:
+        list(pool.map(load_file.read_dataset, [latin1_csv] * 64))
+
+    after = load_file.get_snapshot_stats()
+    assert after["hits"] - before["hits"] == 64
+    assert after["misses"] == before["misses"]
+
+
+def test_amounts_beyond_the_sample_range_parse(tmp_path):
+    source = tmp_path / "bank_credit_card_cancellation.csv"
+    pd.DataFrame(
+        {
+            "Valor Transacoes 12m": [18484, 250_000],
+            "Limite Consumido": [2517, 90_000],
+            "Meses como Cliente": [56, 300],
+        }
+    ).to_csv(source, index=False)
+
+    df = load_file.read_file(source)
+
+    assert df["Valor Transacoes 12m"].tolist() == [18484, 250_000]
+    assert df["Limite Consumido"].tolist() == [2517, 90_000]
+    assert df["Meses como Cliente"].tolist() == [56, 300]
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        ("Educação\nPós\n".encode("utf-8"), "utf-8"),
+        (codecs.BOM_UTF8 + "Educação\n".encode("utf-8"), "utf-8-sig"),
+        ("Educação\nPós\n".encode("latin-1"), "latin-1"),
+        # A multi-byte character cut by the sniffed prefix is still UTF-8
+        (b"a" * 7 + "ç".encode("utf-8"), "utf-8"),
+    ],
+)
+def test_detect_encoding_from_prefix(tmp_path, content, expected):
+    path = tmp_path / "dados.csv"
+    path.write_bytes(content)
+    assert load_file._detect_encoding(path, sniff_bytes=8) == expected
+
+
+def test_non_utf8_past_the_prefix_falls_back_to_latin1(tmp_path):
+    path = tmp_path / "dados.csv"
+    rows = b"a\n" * load_file.ENCODING_SNIFF_BYTES
+    path.write_bytes(b"Nome\n" + rows + "João\n".encode("latin-1"))
+    df, encoding = load_file._parse_source(path)
+    assert encoding == "latin-1"
+    assert df["Nome"].iloc[-1] == "João"
+
+
+def test_async_loads_are_shared_per_version(latin1_csv, tmp_path):
+    pd.DataFrame({"id": [1, 2, 3]}).to_csv(tmp_path / "data" / "ids.csv", index=False)
+    futures = load_file.load_datasets_async([latin1_csv, "ids.csv"])
+
+    again = load_file.load_datasets_async([latin1_csv])
+    assert again[latin1_csv] is futures[latin1_csv]
+    assert load_file.load_dataset("ids.csv")["id"].tolist() == [1, 2, 3]
+    assert load_file.is_dataset_ready("ids.csv")
+    pd.testing.assert_frame_equal(
+        load_file.load_dataset(latin1_csv), load_file.read_dataset(latin1_csv)
+    )
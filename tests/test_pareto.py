@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+from utils.pareto import pareto_analysis, top_k_indices
+
+
+def test_pareto_group_reaches_the_threshold():
+    values = pd.Series([5.0, 50.0, 10.0, 30.0, 5.0], index=list("abcde"))
+    customers, curve, summary = pareto_analysis(values, threshold=0.8)
+
+    assert customers.loc[customers["Pareto"]].index.tolist() == ["b", "d"]
+    assert customers.loc["d", "Receita_Acumulada"] == 0.8
+    assert summary["clientes_limiar"] == 2
+    assert summary["share_receita_top20"] == 0.5
+    assert curve["Receita (%)"].iloc[-1] == 100
+
+
+def test_top_k_matches_a_full_sort():
+    values = np.random.default_rng(0).integers(0, 1_000, 10_000)
+    expected = np.argsort(-values, kind="stable")[:50]
+    np.testing.assert_array_equal(values[top_k_indices(values, 50)], values[expected])
@@ -0,0 +1,43 @@
+import pandas as pd
+
+from utils import load_file
+from utils.pipeline import pipeline_version, run_pipeline
+
+calls = []
+
+
+def drop_missing(df):
+    calls.append("drop_missing")
+    return df.dropna()
+
+
+def add_total(df):
+    calls.append("add_total")
+    return df.assign(Total=df["Valor"] * 2)
+
+
+def test_steps_are_cached_per_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(load_file, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(load_file, "SNAPSHOT_DIR", tmp_path / "snapshots")
+    pd.DataFrame({"Valor": [1.0, None, 3.0]}).to_csv(
+        tmp_path / "pipeline_teste.csv", index=False
+    )
+    steps = [("Remover ausentes", drop_missing), ("Total", add_total)]
+
+    df, report = run_pipeline("pipeline_teste.csv", steps)
+    assert df["Total"].tolist() == [2.0, 6.0]
+    assert not report["Cache"].any()
+
+    df, report = run_pipeline("pipeline_teste.csv", steps)
+    assert report["Cache"].all()
+    assert report["Linhas"].tolist() == [2, 2]
+    assert calls == ["drop_missing", "add_total"]
+
+    # The prefix is reused when a step is appended
+    run_pipeline("pipeline_teste.csv", steps + [("Cópia", lambda df: df.copy())])
+    assert calls == ["drop_missing", "add_total"]
+
+    version = pipeline_version("pipeline_teste.csv", steps)
+    assert pipeline_version("pipeline_teste.csv", steps[:1]) != version
+    pd.DataFrame({"Valor": [5.0]}).to_csv(tmp_path / "pipeline_teste.csv", index=False)
+    assert pipeline_version("pipeline_teste.csv", steps) != version
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.query import BACKENDS, group_aggregate, resolve_backend
+
+AVAILABLE = [b for b in BACKENDS if resolve_backend(b) == b]
+
+AGG = {
+    "Taxa": ("Churn_Bin", "mean"),
+    "Total": ("Churn_Bin", "sum"),
+    "Valor": ("Valor", "mean"),
+    "Linhas": ("Churn_Bin", "size"),
+}
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    n = 500
+    return pd.DataFrame(
+        {
+            "TipoContrato": rng.choice(["Mensal", "Anual", None], n),
+            "Churn_Bin": rng.random(n) < 0.3,
+            "Valor": rng.integers(0, 100, n),
+        }
+    )
+
+
+def assert_same(expected, result):
+    assert result["TipoContrato"].tolist() == expected["TipoContrato"].tolist()
+    for out in AGG:
+        np.testing.assert_allclose(
+            result[out].astype(float), expected[out].astype(float)
+        )
+
+
+@pytest.mark.parametrize("backend", AVAILABLE)
+def test_bool_column_parity(df, backend, tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.query.QUERY_DIR", tmp_path)
+    expected = group_aggregate(df, None, "TipoContrato", AGG, backend="pandas")
+    result = group_aggregate(
+        df, f"test-bool-{backend}", "TipoContrato", AGG, backend=backend
+    )
+    assert_same(expected, result)
+
+
+@pytest.mark.parametrize("backend", AVAILABLE)
+def test_parquet_file_source(df, backend, tmp_path):
+    path = tmp_path / "source.parquet"
+    df.to_parquet(path, index=False)
+    expected = group_aggregate(df, None, "TipoContrato", AGG, backend="pandas")
+    result = group_aggregate(path, "test-file", "TipoContrato", AGG, backend=backend)
+    assert_same(expected, result)
+
+
+@pytest.mark.parametrize("backend", AVAILABLE)
+def test_categorical_keys_keep_category_order(backend, tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.query.QUERY_DIR", tmp_path)
+    months = pd.CategoricalDtype(["2021/12", "2022/01", "2021/02"], ordered=True)
+    df = pd.DataFrame(
+        {
+            "Ano_Mes": pd.Series(["2021/02", "2021/12", "2022/01", "2021/12"]).astype(
+                months
+            ),
+            "Valor": [1, 2, 3, 4],
+        }
+    )
+    agg = {"Total": ("Valor", "sum")}
+    expected = group_aggregate(df, None, "Ano_Mes", agg, backend="pandas")
+    result = group_aggregate(df, f"test-cat-{backend}", "Ano_Mes", agg, backend=backend)
+
+    assert result["Ano_Mes"].tolist() == ["2021/12", "2022/01", "2021/02"]
+    assert result["Ano_Mes"].tolist() == expected["Ano_Mes"].tolist()
+    assert result["Total"].tolist() == [6, 3, 1]
+
+
+@pytest.mark.parametrize("backend", [b for b in AVAILABLE if b != "pandas"])
+def test_frame_export_requires_version(df, backend, tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.query.QUERY_DIR", tmp_path)
+    with pytest.raises(ValueError):
+        group_aggregate(df, None, "TipoContrato", AGG, backend=backend)
+
+
+@pytest.mark.skipif(len(AVAILABLE) < 2, reason="sem motor Parquet instalado")
+def test_old_exports_are_pruned(df, tmp_path, monkeypatch):
+    monkeypatch.setattr("utils.query.QUERY_DIR", tmp_path)
+    monkeypatch.setattr("utils.query.QUERY_EXPORTS", 2)
+    for version in range(4):
+        group_aggregate(df, version, "TipoContrato", AGG, backend=AVAILABLE[1])
+    assert len(list(tmp_path.glob("*.parquet"))) == 2
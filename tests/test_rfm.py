@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_rfm import assert_same_output, legacy_rfm, make_synthetic_data
+from utils.rfm import (
+    N_QUANTILES,
+    RFMStore,
+    assign_segments,
+    compute_rfm,
+    get_segment,
+    monthly_rfm_snapshots,
+    segment_migrations,
+)
+
+
+def test_segment_lookup_matches_get_segment_on_every_cell():
+    r, f = np.meshgrid(np.arange(1, N_QUANTILES + 1), np.arange(1, N_QUANTILES + 1))
+    r, f = r.ravel(), f.ravel()
+    segments = assign_segments(r, f)
+
+    assert len(segments) == N_QUANTILES**2
+    assert list(segments) == [get_segment(a, b) for a, b in zip(r, f)]
+
+
+def test_compute_rfm_matches_row_wise_pipeline():
+    df_transacoes, df_merged = make_synthetic_data(2_000)
+    assert_same_output(
+        legacy_rfm(df_transacoes, df_merged), compute_rfm(df_transacoes, df_merged)
+    )
+
+
+def test_incremental_store_matches_full_recompute(tmp_path):
+    df_transacoes, df_merged = make_synthetic_data(1_000)
+    df_transacoes = df_transacoes.sort_values("data_transacao", kind="stable")
+    cut = df_transacoes["data_transacao"].max() - pd.Timedelta(days=3)
+    history = df_transacoes[df_transacoes["data_transacao"] <= cut]
+    delta = df_transacoes[df_transacoes["data_transacao"] > cut]
+
+    # The store also resumes from disk between batches
+    RFMStore.from_transactions(history).save(tmp_path / "store.npz")
+    store = RFMStore.load(tmp_path / "store.npz").update(delta)
+
+    assert_same_output(
+        compute_rfm(df_transacoes, df_merged), store.to_rfm(df_merged)
+    )
+
+
+def test_unscored_months_are_reported():
+    df_transacoes, df_merged = make_synthetic_data(50, tx_per_customer=2)
+    snapshots, report = monthly_rfm_snapshots(df_transacoes, df_merged)
+
+    skipped = report.loc[~report["Pontuado"], "Snapshot"]
+    assert len(skipped) > 0
+    assert len(report) == len(snapshots) + len(skipped)
+    assert not set(skipped) & set(snapshots)
+    assert (report.loc[~report["Pontuado"], "Clientes"] == 0).all()
+
+
+def test_migrations_only_between_adjacent_months():
+    df_transacoes, df_merged = make_synthetic_data(200)
+    snapshots, _ = monthly_rfm_snapshots(df_transacoes, df_merged)
+    months = sorted(snapshots)
+    gap = months[len(months) // 2]
+    del snapshots[gap]
+
+    migrations = segment_migrations(snapshots)
+    after_gap = gap + pd.offsets.MonthEnd(1)
+    assert after_gap not in migrations
+    assert len(migrations) == len(months) - 3
+    for month in migrations:
+        assert month - pd.offsets.MonthEnd(1) in snapshots
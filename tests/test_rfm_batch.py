@@ -0,0 +1,22 @@
+import pandas as pd
+
+from utils import load_file, rfm_batch
+
+
+def test_input_outside_data_dir_is_read_without_snapshot(tmp_path, monkeypatch):
+    data_dir, snapshot_dir = tmp_path / "data", tmp_path / "snapshots"
+    data_dir.mkdir()
+    monkeypatch.setattr(rfm_batch, "DATA_DIR", data_dir)
+    monkeypatch.setattr(load_file, "DATA_DIR", data_dir)
+    monkeypatch.setattr(load_file, "SNAPSHOT_DIR", snapshot_dir)
+    source = tmp_path / "export" / "transacoes.csv"
+    source.parent.mkdir()
+    pd.DataFrame({"id_cliente": [1, 2], "id_transacao": [10, 11]}).to_csv(
+        source, index=False
+    )
+
+    df = rfm_batch.read_input(str(source))
+
+    assert df["id_transacao"].tolist() == [10, 11]
+    assert list(source.parent.iterdir()) == [source]
+    assert not snapshot_dir.exists()
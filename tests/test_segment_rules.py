@@ -0,0 +1,56 @@
+import pytest
+
+from benchmarks.bench_rfm import make_synthetic_data
+from utils.paths import RULES_DIR
+from utils.rfm import compute_rfm
+from utils.segment_rules import (
+    RuleSetError,
+    available_rule_sets,
+    compile_rule_set,
+    load_rule_set,
+    score_rule_sets,
+)
+
+
+def test_default_rules_match_get_segment():
+    rfm = compute_rfm(*make_synthetic_data(2_000))
+    rule_set = load_rule_set(RULES_DIR / "rfm_padrao.json")
+
+    segments = score_rule_sets(rfm, {"padrao": rule_set})["padrao"]
+    assert segments.astype(str).tolist() == rfm["Segment"].astype(str).tolist()
+
+
+def test_shipped_rule_sets_compile():
+    rule_sets, errors = available_rule_sets()
+    assert errors == []
+    assert "Padrão (R x F)" in rule_sets
+
+
+@pytest.mark.parametrize(
+    "rules, message",
+    [
+        ([{"segment": "A", "when": {"R": ">=3"}}], "sem segmento"),
+        (
+            [
+                {"segment": "A", "when": {}},
+                {"segment": "B", "when": {"R": "<=2"}},
+            ],
+            "nunca é aplicada",
+        ),
+        ([{"segment": "A", "when": {"X": ">=3"}}], "Score desconhecido"),
+    ],
+)
+def test_invalid_rule_sets_are_rejected(rules, message):
+    with pytest.raises(RuleSetError, match=message):
+        compile_rule_set({"name": "teste", "rules": rules})
+
+
+def test_exclusive_rule_sets_reject_overlaps():
+    rules = [
+        {"segment": "A", "when": {"R": ">=3"}},
+        {"segment": "B", "when": {"F": ">=3"}},
+        {"segment": "C", "when": {}},
+    ]
+    assert compile_rule_set({"rules": rules}).overlaps
+    with pytest.raises(RuleSetError, match="exclusivas"):
+        compile_rule_set({"rules": rules, "exclusive": True})
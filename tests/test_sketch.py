@@ -0,0 +1,27 @@
+import numpy as np
+
+from benchmarks.bench_rfm import make_synthetic_data
+from utils.rfm import customer_rfm_metrics, sketch_error_report, sketch_quintile_codes
+from utils.sketch import KLLSketch
+
+
+def test_merged_shard_sketches_keep_the_rank_error_bound():
+    values = np.random.default_rng(0).normal(size=200_000)
+    sketch = KLLSketch(200, seed=0).update(values[:100_000])
+    sketch.merge(KLLSketch(200, seed=1).update(values[100_000:]))
+
+    qs = np.linspace(0.05, 0.95, 19)
+    ranks = np.searchsorted(np.sort(values), sketch.quantile(qs)) / len(values)
+    assert len(sketch) == len(values)
+    assert sketch.retained < 10 * 200
+    assert np.abs(ranks - qs).max() < 1.7 / 200 * 3
+
+
+def test_sketch_quintiles_close_to_exact_qcut():
+    df_transacoes, df_merged = make_synthetic_data(20_000)
+    rfm = customer_rfm_metrics(df_transacoes, df_merged)
+    codes, sketch = sketch_quintile_codes(rfm, chunk_size=5_000, seed=0)
+
+    report = sketch_error_report(rfm, sketch, codes)
+    assert (report["Erro de rank máx."] < 0.01).all()
+    assert (report["Scores divergentes (%)"] < 1).all()
@@ -0,0 +1,35 @@
+from streamlit.testing.v1 import AppTest
+
+
+def lazy_page():
+    import streamlit as st
+
+    from utils.ui import lazy_expander, lazy_tabs
+
+    section = lazy_tabs(["Resumo", "Detalhes"], key="secao")
+    if section == "Resumo":
+        st.markdown("resumo")
+        with lazy_expander("Grade", key="grade") as load:
+            if load:
+                st.markdown("grade")
+    elif section == "Detalhes":
+        st.markdown("detalhes")
+
+
+def rendered(at):
+    return [m.value for m in at.markdown]
+
+
+def test_only_the_selected_section_and_loaded_blocks_run():
+    at = AppTest.from_function(lazy_page).run()
+    assert rendered(at) == ["resumo"]
+
+    at.toggle(key="grade").set_value(True).run()
+    assert rendered(at) == ["resumo", "grade"]
+
+    at.radio(key="secao").set_value("Detalhes").run()
+    assert rendered(at) == ["detalhes"]
+
+    # The toggle keeps its state when the section comes back
+    at.radio(key="secao").set_value("Resumo").run()
+    assert rendered(at) == ["resumo", "grade"]
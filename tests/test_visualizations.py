@@ -0,0 +1,118 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.aggregates import COUNT_COL
+from utils.visualizations import (
+    _grid_pool,
+    bin_2d,
+    box_stats,
+    build_figures,
+    histogram_counts,
+)
+
+
+def test_histogram_counts_with_color_on_copy_on_write_frame():
+    # Copy-on-Write is always on from pandas 3 (requirements.txt)
+    df = pd.DataFrame(
+        {
+            "valor": [1.0, 2.0, np.nan, 4.0, 5.0, 6.0],
+            "Categoria": ["a", "b", "a", None, "b", "a"],
+        }
+    )
+    counts = histogram_counts(df, "valor", color="Categoria", bins=3)
+
+    # NaN em x e em color ficam de fora
+    assert counts[COUNT_COL].sum() == 4
+    assert set(counts["Categoria"]) == {"a", "b"}
+    assert counts.groupby("Categoria")[COUNT_COL].sum().to_dict() == {"a": 2, "b": 2}
+
+
+def test_histogram_counts_colored_by_x_itself():
+    df = pd.DataFrame({"Categoria": ["a", "b", "a", None]})
+    counts = histogram_counts(df, "Categoria", color="Categoria")
+
+    assert list(counts.columns) == ["Categoria", COUNT_COL]
+    assert dict(zip(counts["Categoria"], counts[COUNT_COL])) == {"a": 2, "b": 1}
+
+
+def test_histogram_counts_matches_numpy_histogram():
+    values = np.random.default_rng(0).normal(size=1_000)
+    counts = histogram_counts(pd.DataFrame({"v": values}), "v", bins=10)
+    expected, _ = np.histogram(values, bins=10)
+    assert counts[COUNT_COL].tolist() == expected[expected > 0].tolist()
+
+
+def test_build_figures_keeps_item_order():
+    items = list(range(20))
+    assert list(build_figures(lambda i: i * i, items, workers=4)) == [
+        i * i for i in items
+    ]
+
+
+def test_build_figures_bounds_tasks_in_flight():
+    started = []
+
+    def build(i):
+        started.append(i)
+        return i
+
+    figures = build_figures(build, range(10), workers=3)
+    assert next(figures) == 0
+    assert len(started) <= 3
+    assert list(figures) == list(range(1, 10))
+
+
+def test_build_figures_shares_one_pool_across_worker_counts():
+    counts = [2, 3, 4, 5]
+
+    def session(workers):
+        return list(build_figures(lambda i: i + workers, range(10), workers))
+
+    with ThreadPoolExecutor(len(counts)) as sessions:
+        results = list(sessions.map(session, counts))
+
+    assert results == [[i + w for i in range(10)] for w in counts]
+    assert not _grid_pool._shutdown
+
+
+def test_bin_2d_drops_missing_coordinates():
+    df = pd.DataFrame(
+        {
+            "x": [0.0, 1.0, np.nan, 10.0, 10.0],
+            "y": [0.0, 1.0, 5.0, np.nan, 10.0],
+            "Segmento": ["a", "a", "a", "b", "b"],
+        }
+    )
+    cells = bin_2d(df, "x", "y", color="Segmento", bins=2)
+
+    assert cells["Contagem"].sum() == 3
+    assert cells.groupby("Segmento")["Contagem"].sum().to_dict() == {"a": 2, "b": 1}
+
+
+def test_box_stats_match_pandas_quartiles():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "Categoria": rng.choice(["a", "b", "c"], 3_000),
+            "valor": rng.standard_cauchy(3_000),
+        }
+    )
+    df.loc[::50, "valor"] = np.nan
+    stats, outliers = box_stats(df, "Categoria", "valor", max_outliers=10)
+
+    grouped = df.dropna().groupby("Categoria")["valor"]
+    stats = stats.set_index("Categoria")
+    for q, col in [(0.25, "q1"), (0.5, "median"), (0.75, "q3")]:
+        np.testing.assert_allclose(stats[col], grouped.quantile(q))
+    iqr = stats["q3"] - stats["q1"]
+    low, high = stats["q1"] - 1.5 * iqr, stats["q3"] + 1.5 * iqr
+    for group, values in grouped:
+        inside = values[(values >= low[group]) & (values <= high[group])]
+        assert stats.loc[group, "lowerfence"] == inside.min()
+        assert stats.loc[group, "upperfence"] == inside.max()
+        assert stats.loc[group, "outliers"] == len(values) - len(inside)
+        sampled = outliers.loc[outliers["Categoria"] == group, "valor"]
+        assert len(sampled) == 10
+        assert {values.min(), values.max()} <= set(sampled)
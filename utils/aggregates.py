@@ -0,0 +1,160 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+from utils.load_file import shared_view
+from utils.query import group_aggregate, resolve_backend
+
+# Memory budget of the aggregate cache (AGGREGATE_CACHE_MB env var); least
+# recently used results are evicted past it
+AGGREGATE_CACHE_MB = float(os.environ.get("AGGREGATE_CACHE_MB", "256"))
+
+# Counters of evicted aggregations are kept for the stats panel, up to this
+# many keys (oldest evicted first)
+STATS_MAX_KEYS = 1024
+
+COUNT_COL = "Contagem"
+
+STATS_COLUMNS = [
+    "Agregação",
+    "Versão",
+    "Acertos",
+    "Falhas",
+    "Tempo (ms)",
+    "Economizado (ms)",
+    "Memória (KB)",
+    "Em cache",
+]
+
+# Module-level, so shared by every rerun and session of the process
+_lock = threading.Lock()
+_entries = OrderedDict()  # key -> (result, nbytes)
+_stats = OrderedDict()  # key -> counters, kept after eviction (bounded)
+_total_bytes = 0
+
+
+def _nbytes(result):
+    if isinstance(result, (tuple, list)):
+        return sum(_nbytes(item) for item in result)
+    if isinstance(result, pd.DataFrame):
+        return int(result.memory_usage(index=True, deep=True).sum())
+    if isinstance(result, pd.Series):
+        return int(result.memory_usage(index=True, deep=True))
+    return sys.getsizeof(result)
+
+
+def _evict(budget_bytes):
+    global _total_bytes
+    while _entries and _total_bytes > budget_bytes:
+        _, (_, nbytes) = _entries.popitem(last=False)
+        _total_bytes -= nbytes
+
+
+def _trim_stats():
+    # Only counters of evicted keys are dropped, least recently used first
+    excess = len(_stats) - max(STATS_MAX_KEYS, len(_entries))
+    if excess <= 0:
+        return
+    for key in [k for k in _stats if k not in _entries][:excess]:
+        del _stats[key]
+
+
+def cached_aggregate(version, spec, compute):
+    """
+    Return compute() memoized under (version, spec), shared by all sessions.
+
+    `version` must identify the input data (e.g. utils.pipeline.pipeline_version)
+    and `spec` the aggregation (keys, columns, functions); both are part of the
+    key through their repr. Frames are returned as copy-on-write views.
+    """
+    global _total_bytes
+    key = (version, repr(spec))
+    with _lock:
+        stats = _stats.setdefault(
+            key, {"hits": 0, "misses": 0, "seconds": 0.0, "saved": 0.0}
+        )
+        _stats.move_to_end(key)
+        if key in _entries:
+            _entries.move_to_end(key)
+            stats["hits"] += 1
+            stats["saved"] += stats["seconds"]
+            return shared_view(_entries[key][0])
+        stats["misses"] += 1
+
+    # Computed outside the lock: concurrent misses may both compute
+    start = time.perf_counter()
+    result = compute()
+    seconds = time.perf_counter() - start
+
+    nbytes = _nbytes(result)
+    with _lock:
+        stats["seconds"] = seconds
+        if key not in _entries:
+            _entries[key] = (result, nbytes)
+            _total_bytes += nbytes
+        _evict(AGGREGATE_CACHE_MB * 1024 * 1024)
+        _trim_stats()
+    return shared_view(result)
+
+
+def groupby_agg(df, version, by, agg):
+    """
+    df.groupby(by) aggregated and reset to columns, through the shared cache
+    and the configured query backend (utils.query).
+
+    Args:
+        df: Frame identified by `version`.
+        version: Identifier of df's content (dataset version + transforms).
+        by: Column or list of columns to group by.
+        agg: "size" (counts in a "Contagem" column) or a named aggregation
+            dict {output: (column, func)}.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    if agg == "size":
+        agg = {COUNT_COL: (by[0], "size")}
+    backend = resolve_backend()
+
+    return cached_aggregate(
+        version,
+        ("groupby", backend, by, agg),
+        lambda: group_aggregate(df, version, by, agg, backend=backend),
+    )
+
+
+def get_aggregate_stats():
+    """
+    Return one row per aggregation seen by this process: hits, misses,
+    compute time, time saved by the hits, and memory while cached.
+    """
+    with _lock:
+        rows = []
+        for key, stats in _stats.items():
+            version, spec = key
+            cached = key in _entries
+            rows.append(
+                {
+                    "Agregação": spec,
+                    "Versão": version,
+                    "Acertos": stats["hits"],
+                    "Falhas": stats["misses"],
+                    "Tempo (ms)": stats["seconds"] * 1000,
+                    "Economizado (ms)": stats["saved"] * 1000,
+                    "Memória (KB)": _entries[key][1] / 1024 if cached else 0.0,
+                    "Em cache": cached,
+                }
+            )
+    return pd.DataFrame(rows, columns=STATS_COLUMNS)
+
+
+def clear_aggregates():
+    """
+    Drop every cached aggregation and its counters.
+    """
+    global _total_bytes
+    with _lock:
+        _entries.clear()
+        _stats.clear()
+        _total_bytes = 0
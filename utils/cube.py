@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+COUNT_COL = "Qtd"
+
+
+def _above(measure):
+    return f"{measure}_acima", f"{COUNT_COL}_acima"
+
+
+def build_cube(df, dimensions, measure, threshold=None):
+    """
+    Rollup cube: sum and count of `measure` for every observed combination
+    of `dimensions`, so questions over any subset of them can be answered
+    from the cube instead of the raw rows.
+
+    With `threshold`, the cube also keeps the sum and count of the values
+    above it (`<measure>_acima`, `Qtd_acima`), enough to answer rules such
+    as "discount on sales over 1000" exactly. Rows with missing dimension
+    values are kept, so grand totals still match the raw frame.
+    """
+    values = df[measure]
+    columns = {measure: values, COUNT_COL: values}
+    aggs = {measure: (measure, "sum"), COUNT_COL: (COUNT_COL, "count")}
+    if threshold is not None:
+        sum_col, count_col = _above(measure)
+        above = values.where(values > threshold)
+        columns |= {sum_col: above, count_col: above}
+        aggs |= {sum_col: (sum_col, "sum"), count_col: (count_col, "count")}
+
+    frame = pd.DataFrame({dim: df[dim] for dim in dimensions} | columns)
+    cube = frame.groupby(dimensions, observed=True, dropna=False).agg(**aggs)
+    return cube.reset_index()
+
+
+def rollup(cube, by, measure, agg="sum", filters=None):
+    """
+    Aggregate the cube to the `by` dimensions, after keeping only the cells
+    matching `filters` ({dimension: value}). Returns `by` plus `measure`
+    holding the sum, count or mean (sum of sums / sum of counts) — the same
+    frame as df.groupby(by)[measure].<agg>().reset_index() on the raw rows.
+    """
+    if filters:
+        mask = np.logical_and.reduce(
+            [cube[dim].to_numpy() == value for dim, value in filters.items()]
+        )
+        cube = cube[mask]
+
+    grouped = cube.groupby(by, observed=True)[[measure, COUNT_COL]].sum()
+    if agg == "sum":
+        result = grouped[measure]
+    elif agg == "count":
+        result = grouped[COUNT_COL]
+    elif agg == "mean":
+        result = grouped[measure] / grouped[COUNT_COL].replace(0, np.nan)
+    else:
+        raise ValueError(f"Agregação não suportada: {agg}")
+    return result.rename(measure).reset_index()
+
+
+def totals(cube, measure):
+    """
+    Grand totals from the cube: sum, count and, when the cube was built
+    with a threshold, sum and count of the values above it.
+    """
+    result = {"soma": cube[measure].sum(), "qtd": cube[COUNT_COL].sum()}
+    sum_col, count_col = _above(measure)
+    if sum_col in cube:
+        result |= {
+            "soma_acima": cube[sum_col].sum(),
+            "qtd_acima": cube[count_col].sum(),
+        }
+    return result
+
+
+PATH_SEP = " / "
+
+
+def hierarchy(leaves, path, measure, top_n=None, other_label="Outros"):
+    """
+    Tree nodes of `path` (e.g. Categoria -> SubCategoria) from leaf totals
+    such as rollup(cube, path, measure), for a sunburst/treemap drawn with
+    branchvalues="total" instead of letting plotly aggregate rows.
+
+    With `top_n` (an int, or one value per level; None keeps every child),
+    each node keeps its top_n children by `measure` and merges the rest into
+    a single `other_label` leaf, so parents still add up and the number of
+    nodes stays bounded. Returns one row per node with `id`, `parent`,
+    `label`, the top-level value (in a `path[0]` column) and `measure`.
+    """
+    path = list(path)
+    if top_n is None or isinstance(top_n, int):
+        top_n = [top_n] * len(path)
+    frame = leaves[path + [measure]].astype({col: str for col in path})
+
+    for i, n in enumerate(top_n):
+        if n is None:
+            continue
+        keys = path[: i + 1]
+        level_totals = frame.groupby(keys)[measure].sum()
+        if i == 0:
+            rank = level_totals.rank(method="first", ascending=False)
+            pruned = frame[path[0]].isin(rank.index[rank > n])
+        else:
+            rank = level_totals.groupby(level=list(range(i))).rank(
+                method="first", ascending=False
+            )
+            pruned = pd.MultiIndex.from_frame(frame[keys]).isin(rank.index[rank > n])
+        frame.loc[pruned, path[i]] = other_label
+        frame.loc[pruned, path[i + 1 :]] = None
+
+    nodes = []
+    for i, col in enumerate(path):
+        keys = path[: i + 1]
+        sums = frame.dropna(subset=[col]).groupby(keys)[measure].sum().reset_index()
+        ids, parents = sums[path[0]], ""
+        for key in keys[1:]:
+            parents = ids
+            ids = ids + PATH_SEP + sums[key]
+        nodes.append(
+            pd.DataFrame(
+                {
+                    "id": ids,
+                    "parent": parents,
+                    "label": sums[col],
+                    path[0]: sums[path[0]],
+                    measure: sums[measure],
+                }
+            )
+        )
+    return pd.concat(nodes, ignore_index=True)
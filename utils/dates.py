@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+CALENDAR_ATTRIBUTES = ["Ano", "Mes", "Ano_Mes"]
+
+
+def calendar_table(dates):
+    """
+    Calendar attributes for a (small) set of distinct dates: Ano (int16),
+    Mes (int8) and Ano_Mes as an ordered category of "YYYY/MM" labels.
+    Missing dates get missing attributes (nullable integers).
+    """
+    dates = pd.DatetimeIndex(dates)
+    missing = dates.isna()
+    year, month = dates.year, dates.month
+
+    if missing.all():
+        labels, month_codes = [], np.full(len(dates), -1)
+    else:
+        first = dates[~missing].min().to_period("M")
+        last = dates[~missing].max().to_period("M")
+        labels = pd.period_range(first, last, freq="M").strftime("%Y/%m")
+        offset = (year - first.year) * 12 + (month - first.month)
+        month_codes = np.where(missing, -1, offset).astype(np.int64)
+
+    int_types = ("Int16", "Int8") if missing.any() else ("int16", "int8")
+    return pd.DataFrame(
+        {
+            "Data": dates,
+            "Ano": pd.array(year, dtype=int_types[0]),
+            "Mes": pd.array(month, dtype=int_types[1]),
+            "Ano_Mes": pd.Categorical.from_codes(
+                month_codes, categories=labels, ordered=True
+            ),
+        }
+    )
+
+
+def parse_dates(values, format=None, dayfirst=False):
+    """
+    Factorize a date column and parse each distinct string once.
+
+    Returns (codes, uniques): rows map to the parsed distinct dates through
+    `codes`; missing or unparseable values point to a trailing NaT.
+    """
+    codes, uniques = pd.factorize(values)
+    if not isinstance(uniques, pd.DatetimeIndex):
+        uniques = pd.to_datetime(
+            uniques, format=format, dayfirst=dayfirst, errors="coerce"
+        )
+    missing = codes < 0
+    if missing.any():
+        uniques = uniques.append(pd.DatetimeIndex([pd.NaT]))
+        codes = np.where(missing, len(uniques) - 1, codes)
+    return codes, uniques
+
+
+def add_date_dimension(df, column, format=None, dayfirst=False):
+    """
+    Replace `column` with parsed dates and add Ano, Mes and Ano_Mes, derived
+    from the calendar of its distinct values instead of row by row.
+
+    With `format` (e.g. "%d/%m/%Y") no inference is needed; without it,
+    inference only runs on the distinct strings.
+    """
+    codes, uniques = parse_dates(df[column], format=format, dayfirst=dayfirst)
+    calendar = calendar_table(uniques)
+    df[column] = uniques.take(codes)
+    for attribute in CALENDAR_ATTRIBUTES:
+        df[attribute] = calendar[attribute].array.take(codes)
+    return df
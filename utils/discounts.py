@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+SWEEP_COLUMNS = [
+    "Limite",
+    "Desconto",
+    "Pedidos Afetados",
+    "Receita",
+    "Impacto na Receita",
+    "Ticket Médio",
+]
+
+
+def sorted_sales(values):
+    """
+    Sort order values once for discount sweeps. Missing values are dropped.
+
+    Returns (sales, prefix): ascending values and their prefix sums, with
+    prefix[i] = sum of the i smallest values (prefix[0] = 0). Both arrays are
+    read-only, so they can be shared between sessions.
+    """
+    sales = np.asarray(values, dtype=np.float64)
+    sales = np.sort(sales[~np.isnan(sales)])
+    prefix = np.concatenate(([0.0], np.cumsum(sales)))
+    sales.flags.writeable = False
+    prefix.flags.writeable = False
+    return sales, prefix
+
+
+def discount_sweep(sales, prefix, thresholds, rates):
+    """
+    Evaluate "`rate` off every order above `threshold`" for the whole grid
+    of thresholds x rates from the sorted sales (see sorted_sales).
+
+    Each threshold costs one binary search: the orders above it are a suffix
+    of `sales`, whose sum comes from the prefix sums. The grid is then a
+    broadcast over the rates, so no pass over the orders is repeated.
+
+    Returns one row per (threshold, rate) with the affected order count,
+    revenue after the discount, its difference to the undiscounted revenue
+    and the average ticket.
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    rates = np.asarray(rates, dtype=np.float64)
+    n = len(sales)
+    total = prefix[-1]
+
+    first_above = np.searchsorted(sales, thresholds, side="right")
+    affected = n - first_above
+    above_sum = total - prefix[first_above]
+
+    impact = -above_sum[:, None] * rates[None, :]
+    revenue = total + impact
+    ticket = revenue / n if n else np.full_like(revenue, np.nan)
+
+    return pd.DataFrame(
+        {
+            "Limite": np.repeat(thresholds, len(rates)),
+            "Desconto": np.tile(rates, len(thresholds)),
+            "Pedidos Afetados": np.repeat(affected, len(rates)),
+            "Receita": revenue.ravel(),
+            "Impacto na Receita": impact.ravel(),
+            "Ticket Médio": ticket.ravel(),
+        },
+        columns=SWEEP_COLUMNS,
+    )
@@ -0,0 +1,142 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.io as pio
+from utils.paths import FIGURE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Memory budget of the serialized figures (FIGURE_CACHE_MB env var); least
+# recently used figures are evicted past it. With FIGURE_CACHE_DISK=1 the
+# JSON is also kept in .cache/figures and survives restarts.
+FIGURE_CACHE_MB = float(os.environ.get("FIGURE_CACHE_MB", "64"))
+FIGURE_CACHE_DISK = os.environ.get("FIGURE_CACHE_DISK", "0") == "1"
+
+STATS_COLUMNS = ["Gráfico", "Memória", "Disco", "Falhas", "Taxa de Acerto"]
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # key -> figure JSON
+_stats = {}  # chart name -> counters
+_total_bytes = 0
+
+
+def figure_key(version, name, spec):
+    """
+    Hash of (dataset version, chart function, arguments).
+    """
+    return hashlib.sha256(repr((version, name, spec)).encode()).hexdigest()[:32]
+
+
+def _disk_path(key):
+    return FIGURE_DIR / f"{key}.json"
+
+
+def _read_disk(key):
+    try:
+        return _disk_path(key).read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+
+def _write_disk(key, payload):
+    # Failures are logged and ignored: the disk tier is only an accelerator
+    try:
+        FIGURE_DIR.mkdir(parents=True, exist_ok=True)
+        path = _disk_path(key)
+        tmp_path = path.with_suffix(f".json.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(payload, encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not write figure %s: %s", key, e)
+
+
+def _remember(key, payload):
+    global _total_bytes
+    if key in _entries:
+        return
+    _entries[key] = payload
+    _total_bytes += len(payload)
+    budget = FIGURE_CACHE_MB * 1024 * 1024
+    while _entries and _total_bytes > budget:
+        _, evicted = _entries.popitem(last=False)
+        _total_bytes -= len(evicted)
+
+
+def cached_figure(version, name, spec, build):
+    """
+    Return the figure built by build(), memoized as JSON under
+    figure_key(version, name, spec) and shared by every session.
+
+    `version` must identify the data the figure is drawn from and `spec`
+    every argument that changes it. Without a version, build() is called
+    directly.
+    """
+    if version is None:
+        return build()
+
+    key = figure_key(version, name, spec)
+    with _lock:
+        stats = _stats.setdefault(name, {"memory": 0, "disk": 0, "misses": 0})
+        payload = _entries.get(key)
+        if payload is not None:
+            _entries.move_to_end(key)
+            stats["memory"] += 1
+
+    if payload is None and FIGURE_CACHE_DISK:
+        payload = _read_disk(key)
+        if payload is not None:
+            with _lock:
+                stats["disk"] += 1
+                _remember(key, payload)
+
+    if payload is not None:
+        return pio.from_json(payload)
+
+    fig = build()
+    payload = fig.to_json()
+    with _lock:
+        stats["misses"] += 1
+        _remember(key, payload)
+    if FIGURE_CACHE_DISK:
+        _write_disk(key, payload)
+    return fig
+
+
+def get_figure_stats():
+    """
+    Return memory hits, disk hits, misses and the hit rate per chart function.
+    """
+    with _lock:
+        rows = []
+        for name, stats in _stats.items():
+            hits = stats["memory"] + stats["disk"]
+            total = hits + stats["misses"]
+            rows.append(
+                {
+                    "Gráfico": name,
+                    "Memória": stats["memory"],
+                    "Disco": stats["disk"],
+                    "Falhas": stats["misses"],
+                    "Taxa de Acerto": hits / total if total else 0.0,
+                }
+            )
+    return pd.DataFrame(rows, columns=STATS_COLUMNS)
+
+
+def clear_figures(disk=False):
+    """
+    Drop the figures held in memory (and the disk tier, if `disk`) and
+    reset the counters.
+    """
+    global _total_bytes
+    with _lock:
+        _entries.clear()
+        _stats.clear()
+        _total_bytes = 0
+    if disk:
+        for path in FIGURE_DIR.glob("*.json"):
+            path.unlink(missing_ok=True)
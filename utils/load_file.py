@@ -1,20 +1,448 @@
+import codecs
+import functools
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
 import pandas as pd
 import streamlit as st
-from utils.paths import DATA_DIR
+from utils.paths import DATA_DIR, SNAPSHOT_DIR
+from utils.schemas import BOOL_VALUES, get_schema
 
+try:
+    import pyarrow
+    import pyarrow.feather as feather
+except ImportError:
+    pyarrow = None
 
-@st.cache_data
-def load_dataset(file_name):
+logger = logging.getLogger(__name__)
+
+# Bump when the snapshot layout changes so stale snapshots get rebuilt
+SNAPSHOT_FORMAT_VERSION = 4
+
+# Bytes read from the head of a CSV to decide its encoding
+ENCODING_SNIFF_BYTES = 64 * 1024
+
+# Threads load datasets concurrently (snapshot reads release the GIL).
+# openpyxl/CSV parsing does not, so on multi-core hosts stale sources can be
+# parsed in worker processes instead (DATASET_PARSE_PROCESSES=<n> env var).
+# Process start-up costs ~1s, so it only pays off for large workbooks.
+LOADER_THREADS = 8
+PARSE_PROCESSES = int(os.environ.get("DATASET_PARSE_PROCESSES", "0"))
+
+# Updated from the loader threads, so always under _stats_lock
+_stats_lock = threading.Lock()
+_snapshot_stats = {"hits": 0, "misses": 0, "rebuilds": 0}
+_dataset_encodings = {}
+
+
+def _file_digest(file_path, chunk_size=1 << 20):
     """
-    Load a CSV file from the data directory.
-    Uses centralized path management from utils.paths.
+    Return the SHA-256 of a file, read in fixed-size chunks.
     """
-    file_path = DATA_DIR / file_name
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _snapshot_paths(file_name):
+    return SNAPSHOT_DIR / f"{file_name}.arrow", SNAPSHOT_DIR / f"{file_name}.json"
+
+
+def _tmp_suffix(suffix):
+    # Unique per process/thread: concurrent loaders may rebuild the same file
+    return f"{suffix}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _read_manifest(manifest_path):
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
-    if file_name.endswith(".xlsx"):
-        return pd.read_excel(file_path)
 
+def _write_manifest(manifest_path, manifest):
+    SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_suffix(_tmp_suffix(".json"))
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def _schema_digest(schema):
+    return hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()
+
+
+def _source_fingerprint(file_path, manifest=None):
+    """
+    Describe the source file by size, mtime and content hash, plus the
+    declared schema. The hash is only recomputed when size or mtime differ
+    from the manifest.
+    """
+    stat = file_path.stat()
+    fingerprint = {
+        "format": SNAPSHOT_FORMAT_VERSION,
+        "schema": _schema_digest(get_schema(file_path.name)),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+    if (
+        manifest
+        and manifest.get("size") == fingerprint["size"]
+        and manifest.get("mtime_ns") == fingerprint["mtime_ns"]
+        and manifest.get("sha256")
+    ):
+        fingerprint["sha256"] = manifest["sha256"]
+    else:
+        fingerprint["sha256"] = _file_digest(file_path)
+    return fingerprint
+
+
+def _snapshot_is_valid(manifest, fingerprint, snapshot_path):
+    if not manifest or not snapshot_path.exists():
+        return False
+    return all(
+        manifest.get(key) == fingerprint[key] for key in ("format", "schema", "size", "sha256")
+    )
+
+
+def _detect_encoding(file_path, sniff_bytes=ENCODING_SNIFF_BYTES):
+    """
+    Guess a CSV encoding from a bounded byte prefix (UTF-8 or latin-1).
+    """
+    with open(file_path, "rb") as f:
+        prefix = f.read(sniff_bytes)
+
+    if prefix.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+
+    # Incremental decoding tolerates a multi-byte character cut at the boundary
+    decoder = codecs.getincrementaldecoder("utf-8")()
     try:
-        return pd.read_csv(file_path, encoding="utf-8")
+        decoder.decode(prefix, final=False)
     except UnicodeDecodeError:
-        return pd.read_csv(file_path, encoding="latin-1")
+        return "latin-1"
+    return "utf-8"
+
+
+def _normalize_column(name):
+    """
+    Strip, repair UTF-8 read as latin-1 (e.g. 'EducaÃ§Ã£o') and NFC-normalize.
+    """
+    name = str(name).strip()
+    try:
+        name = name.encode("latin-1").decode("utf-8")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        pass
+    return unicodedata.normalize("NFC", name)
+
+
+def _apply_schema(df, schema):
+    """
+    Cast any column the parser did not already type and map boolean flags.
+    """
+    for col, dtype in schema.items():
+        if col not in df.columns:
+            continue
+        if dtype == "bool":
+            df[col] = df[col].map(BOOL_VALUES).astype("boolean")
+        elif df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def _parse_source(file_path, encoding=None):
+    """
+    Parse a source file once, with its declared dtypes. Returns the frame and
+    the encoding used (None for workbooks).
+    """
+    schema = get_schema(file_path.name)
+    # Boolean flags are parsed as-is and mapped afterwards
+    dtypes = {col: dtype for col, dtype in schema.items() if dtype != "bool"}
+
+    if file_path.suffix == ".xlsx":
+        df = pd.read_excel(file_path, dtype=dtypes)
+    else:
+        encoding = encoding or _detect_encoding(file_path)
+        try:
+            df = pd.read_csv(file_path, encoding=encoding, dtype=dtypes)
+        except UnicodeDecodeError:
+            # Non-UTF-8 bytes past the sniffed prefix
+            logger.info("Encoding %s failed for %s, using latin-1", encoding, file_path)
+            encoding = "latin-1"
+            df = pd.read_csv(file_path, encoding=encoding, dtype=dtypes)
+
+    df.columns = [_normalize_column(c) for c in df.columns]
+    return _apply_schema(df, schema), encoding
+
+
+def _write_snapshot(df, snapshot_path, manifest_path, manifest):
+    """
+    Persist the parsed frame as a Feather (Arrow IPC) snapshot.
+    Failures are logged and ignored: the snapshot is only an accelerator.
+    """
+    try:
+        SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = snapshot_path.with_suffix(_tmp_suffix(".arrow"))
+        # Uncompressed and in a single record batch, so the file can be
+        # memory-mapped and its numeric buffers viewed without copying
+        df.to_feather(tmp_path, compression="uncompressed", chunksize=max(len(df), 1))
+        os.replace(tmp_path, snapshot_path)
+        _write_manifest(manifest_path, manifest)
+    except Exception as e:
+        logger.warning("Could not write snapshot %s: %s", snapshot_path.name, e)
+
+
+def _read_snapshot(snapshot_path):
+    """
+    Memory-map a snapshot. Numeric and string columns stay backed by the
+    mapped file (shared through the OS page cache) instead of the heap.
+    """
+    table = feather.read_table(snapshot_path, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+
+def _known_encoding(manifest, fingerprint):
+    # Reuse the encoding recorded for this dataset unless its content changed
+    if manifest and manifest.get("sha256") == fingerprint["sha256"]:
+        return manifest.get("encoding")
+    return None
+
+
+def _parse_without_snapshot(file_name, file_path, manifest_path, manifest, fingerprint):
+    """
+    Parse the source when pyarrow (and so the snapshot) is unavailable. The
+    manifest is still kept, so the content hash is only recomputed when the
+    source changes and its encoding is not sniffed again.
+    """
+    df, encoding = _parse_source(file_path, _known_encoding(manifest, fingerprint))
+    _dataset_encodings[file_name] = encoding
+    manifest_now = {**fingerprint, "encoding": encoding}
+    if manifest != manifest_now:
+        try:
+            _write_manifest(manifest_path, manifest_now)
+        except OSError as e:
+            logger.warning("Could not write manifest for %s: %s", file_name, e)
+    return df
+
+
+def read_dataset(file_name):
+    """
+    Load a file from the data directory, going through its columnar snapshot.
+
+    The snapshot is keyed by the source's size, mtime and SHA-256 and is
+    rebuilt automatically when the source changes. Without pyarrow the source
+    is parsed on every call. Not cached in memory; pages should use
+    load_dataset instead.
+    """
+    file_path = DATA_DIR / file_name
+    snapshot_path, manifest_path = _snapshot_paths(file_name)
+    manifest = _read_manifest(manifest_path)
+    fingerprint = _source_fingerprint(file_path, manifest)
+
+    if pyarrow is None:
+        return _parse_without_snapshot(
+            file_name, file_path, manifest_path, manifest, fingerprint
+        )
+
+    if _snapshot_is_valid(manifest, fingerprint, snapshot_path):
+        try:
+            df = _read_snapshot(snapshot_path)
+        except Exception as e:
+            logger.warning("Unreadable snapshot for %s: %s", file_name, e)
+        else:
+            with _stats_lock:
+                _snapshot_stats["hits"] += 1
+            _dataset_encodings[file_name] = manifest.get("encoding")
+            if manifest.get("mtime_ns") != fingerprint["mtime_ns"]:
+                # Same content, touched file: refresh the manifest only
+                _write_manifest(manifest_path, {**manifest, **fingerprint})
+            return df
+
+    with _stats_lock:
+        _snapshot_stats["misses"] += 1
+        if manifest:
+            _snapshot_stats["rebuilds"] += 1
+    if manifest:
+        logger.info("Source changed, rebuilding snapshot for %s", file_name)
+
+    df, encoding = _parse_source(file_path, _known_encoding(manifest, fingerprint))
+    _dataset_encodings[file_name] = encoding
+    _write_snapshot(
+        df, snapshot_path, manifest_path, {**fingerprint, "encoding": encoding}
+    )
+    return df
+
+
+def read_file(file_path):
+    """
+    Parse a file anywhere on disk with its declared dtypes, without the
+    snapshot cache: nothing is written next to the source.
+    """
+    df, _ = _parse_source(Path(file_path))
+    return df
+
+
+def dataset_version(file_name):
+    """
+    Return a short identifier of a dataset's content and schema, to be used in
+    cache keys. Cheap once the snapshot manifest exists (stat + small JSON).
+    """
+    manifest = _read_manifest(_snapshot_paths(file_name)[1])
+    fingerprint = _source_fingerprint(DATA_DIR / file_name, manifest)
+    return f"{fingerprint['sha256'][:16]}-{fingerprint['schema'][:8]}"
+
+
+def get_dataset_encoding(file_name):
+    """
+    Return the encoding recorded for a dataset (None if not loaded yet or XLSX).
+    """
+    if file_name not in _dataset_encodings:
+        manifest = _read_manifest(_snapshot_paths(file_name)[1])
+        return manifest.get("encoding") if manifest else None
+    return _dataset_encodings[file_name]
+
+
+def get_snapshot_stats():
+    """
+    Return snapshot hit/miss counters for this process and the hit rate.
+    """
+    with _stats_lock:
+        stats = dict(_snapshot_stats)
+    total = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / total if total else 0.0
+    return stats
+
+
+def shared_view(obj):
+    """
+    Shallow-copy DataFrames/Series (also inside tuples and dicts) so callers
+    get a copy-on-write view of the shared object. Copy-on-Write (always on
+    from pandas 3, required in requirements.txt) keeps writes to the view
+    from reaching the shared data.
+    """
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return obj.copy(deep=False)
+    if isinstance(obj, tuple):
+        return tuple(shared_view(item) for item in obj)
+    if isinstance(obj, dict):
+        return {key: shared_view(value) for key, value in obj.items()}
+    return obj
+
+
+def cache_shared(func=None, *, max_entries=32):
+    """
+    Cache a function once per process (st.cache_resource) and hand out
+    copy-on-write views of the DataFrames it returns.
+
+    Unlike st.cache_data, results are not deserialized per session, so memory
+    stays flat as sessions grow. Mutating a returned frame (e.g. assigning a
+    column) only affects that caller's view.
+    """
+    if func is None:
+        return functools.partial(cache_shared, max_entries=max_entries)
+
+    cached = st.cache_resource(show_spinner=False, max_entries=max_entries)(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return shared_view(cached(*args, **kwargs))
+
+    wrapper.clear = cached.clear
+    return wrapper
+
+
+@st.cache_resource(show_spinner=False)
+def _loader_pool():
+    return ThreadPoolExecutor(
+        max_workers=LOADER_THREADS, thread_name_prefix="dataset-loader"
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def _parse_pool():
+    return ProcessPoolExecutor(
+        max_workers=PARSE_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def _snapshot_is_current(file_name):
+    snapshot_path, manifest_path = _snapshot_paths(file_name)
+    manifest = _read_manifest(manifest_path)
+    fingerprint = _source_fingerprint(DATA_DIR / file_name, manifest)
+    return _snapshot_is_valid(manifest, fingerprint, snapshot_path)
+
+
+def _build_snapshot(file_name):
+    # Runs in a worker process: only the snapshot crosses back, via disk
+    read_dataset(file_name)
+
+
+def _load_in_background(file_name, parse_pool):
+    # Without pyarrow there is no snapshot to hand back from the worker
+    if (
+        parse_pool is not None
+        and pyarrow is not None
+        and not _snapshot_is_current(file_name)
+    ):
+        try:
+            parse_pool.submit(_build_snapshot, file_name).result()
+        except BrokenProcessPool as e:
+            # e.g. workers unable to import the main module; parse here instead
+            logger.warning("Parse pool unavailable for %s: %s", file_name, e)
+    return read_dataset(file_name)
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _dataset_future(file_name, version):
+    """
+    One process-wide load per dataset version; the future's result is the
+    shared frame every session reads from.
+    """
+    parse_pool = _parse_pool() if PARSE_PROCESSES > 0 else None
+    return _loader_pool().submit(_load_in_background, file_name, parse_pool)
+
+
+def load_datasets_async(file_names):
+    """
+    Start loading several datasets concurrently and return immediately.
+
+    Returns a dict {file_name: Future}. Loads are shared by all sessions and
+    started at most once per dataset version; use is_dataset_ready to check
+    progress and load_dataset to get (or wait for) the frame.
+    """
+    return {f: _dataset_future(f, dataset_version(f)) for f in file_names}
+
+
+def is_dataset_ready(file_name):
+    """
+    Return True if the dataset is loaded (or failed) and load_dataset won't block.
+    """
+    return _dataset_future(file_name, dataset_version(file_name)).done()
+
+
+def load_dataset(file_name):
+    """
+    Load a CSV/XLSX file from the data directory.
+    Uses centralized path management from utils.paths and the columnar
+    snapshot cache (see read_dataset). The frame is held once per process
+    and returned as a copy-on-write view.
+    """
+    version = dataset_version(file_name)
+    future = _dataset_future(file_name, version)
+    try:
+        return shared_view(future.result())
+    except Exception:
+        # Don't keep a failed load cached: the next call retries
+        _dataset_future.clear(file_name, version)
+        raise
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+PARETO_THRESHOLD = 0.8
+
+
+def top_k_indices(values, k):
+    """
+    Positions of the k largest values, largest first. Uses partial selection
+    (np.argpartition, O(n)) and only sorts the k selected.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    k = min(k, len(values))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-values, k - 1)[:k]
+    return top[np.argsort(-values[top], kind="stable")]
+
+
+def pareto_analysis(values, threshold=PARETO_THRESHOLD, curve_points=100):
+    """
+    Revenue concentration (Pareto / 80-20) over per-customer values, with a
+    single sort and a cumulative sum.
+
+    Returns (customers, curve, summary):
+        customers: frame aligned with `values` with the customer's percentile
+            position (largest value first), the cumulative revenue share up
+            to it and whether it belongs to the group reaching `threshold`.
+        curve: cumulative share sampled at `curve_points` customer percentiles
+            (bounded size, for plotting).
+        summary: Series with the customer count and share needed to reach
+            `threshold`, and the revenue share of the top 20% of customers.
+    """
+    index = values.index if isinstance(values, pd.Series) else None
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    total = values.sum()
+
+    order = np.argsort(-values, kind="stable")
+    if total > 0:
+        cum_share = np.cumsum(values[order]) / total
+        cutoff = min(int(np.searchsorted(cum_share, threshold)) + 1, n)
+    else:
+        cum_share, cutoff = np.zeros(n), 0
+
+    position = np.empty(n, dtype=np.float64)
+    position[order] = np.arange(1, n + 1) / n
+    customer_share = np.empty(n, dtype=np.float64)
+    customer_share[order] = cum_share
+    members = np.zeros(n, dtype=bool)
+    members[order[:cutoff]] = True
+
+    customers = pd.DataFrame(
+        {
+            "Pareto_Percentil": position,
+            "Receita_Acumulada": customer_share,
+            "Pareto": members,
+        },
+        index=index,
+    )
+
+    pct = np.linspace(0, 1, curve_points + 1)
+    sampled = np.maximum(np.ceil(pct * n).astype(np.int64) - 1, 0)
+    curve = pd.DataFrame(
+        {
+            "Clientes (%)": pct * 100,
+            "Receita (%)": np.where(pct > 0, cum_share[sampled] if n else 0, 0) * 100,
+        }
+    )
+
+    top20 = max(int(np.ceil(0.2 * n)), 1) if n else 0
+    summary = pd.Series(
+        {
+            "total": total,
+            "clientes": n,
+            "clientes_limiar": cutoff,
+            "share_clientes_limiar": cutoff / n if n else 0.0,
+            "share_receita_top20": cum_share[top20 - 1] if n else 0.0,
+        }
+    )
+    return customers, curve, summary
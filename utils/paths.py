@@ -8,3 +8,16 @@ PROJECT_ROOT = UTILS_DIR.parent
 
 # Define the data directory
 DATA_DIR = PROJECT_ROOT / "data"
+
+# Segment rule sets for the RFM page (JSON/YAML, see utils.segment_rules)
+RULES_DIR = UTILS_DIR / "rules"
+
+# Define the cache directory for derived artifacts (e.g. dataset snapshots)
+CACHE_DIR = PROJECT_ROOT / ".cache"
+SNAPSHOT_DIR = CACHE_DIR / "snapshots"
+
+# Parquet exports scanned by the DuckDB/Polars query backends (utils.query)
+QUERY_DIR = CACHE_DIR / "query"
+
+# Optional disk tier of the serialized figure cache (utils.figures)
+FIGURE_DIR = CACHE_DIR / "figures"
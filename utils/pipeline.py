@@ -0,0 +1,85 @@
+import hashlib
+import inspect
+import time
+
+import pandas as pd
+from utils.load_file import cache_shared, dataset_version, load_dataset
+
+REPORT_COLUMNS = ["Etapa", "Linhas", "Colunas", "Tempo (ms)", "Cache"]
+
+
+def _step_key(name, func):
+    """
+    Identify a step by its name and source code, so editing a step
+    invalidates its cached output (and every step after it).
+    """
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = f"{func.__module__}.{func.__qualname__}"
+    return f"{name}:{hashlib.sha256(source.encode()).hexdigest()[:12]}"
+
+
+@cache_shared
+def _run_steps(file_name, version, step_keys, _steps):
+    """
+    Output of the first len(step_keys) steps, memoized per dataset version.
+    `_steps` is not hashed: step_keys already identifies the functions.
+    """
+    if not step_keys:
+        return load_dataset(file_name), 0.0, time.time()
+
+    df, _, _ = _run_steps(file_name, version, step_keys[:-1], _steps[:-1])
+
+    _, func = _steps[-1]
+    start = time.perf_counter()
+    df = func(df)
+    return df, time.perf_counter() - start, time.time()
+
+
+def pipeline_version(file_name, steps):
+    """
+    Key for results derived from a pipeline's output: changes with the
+    source dataset and with the code of any step.
+    """
+    keys = [dataset_version(file_name)]
+    keys += [_step_key(name, func) for name, func in steps]
+    return hashlib.sha256("|".join(keys).encode()).hexdigest()[:16]
+
+
+def run_pipeline(file_name, steps):
+    """
+    Load a dataset and apply a declarative list of transform steps.
+
+    Args:
+        file_name: File in data/ (see utils.load_file.load_dataset).
+        steps: List of (name, function); each function takes and returns a DataFrame.
+
+    Each step's output is cached once per process and dataset version, so
+    widget reruns don't repeat the cleaning. Returns (df, report), where the
+    report lists rows, columns, compute time and cache reuse of every step.
+    """
+    version = dataset_version(file_name)
+    step_keys = tuple(_step_key(name, func) for name, func in steps)
+    steps = tuple(steps)
+    run_start = time.time()
+
+    rows = []
+    for i, (name, _) in enumerate(steps, start=1):
+        df, seconds, computed_at = _run_steps(
+            file_name, version, step_keys[:i], steps[:i]
+        )
+        rows.append(
+            {
+                "Etapa": name,
+                "Linhas": len(df),
+                "Colunas": df.shape[1],
+                "Tempo (ms)": seconds * 1000,
+                "Cache": computed_at < run_start,
+            }
+        )
+
+    if not steps:
+        df, _, _ = _run_steps(file_name, version, (), ())
+
+    return df, pd.DataFrame(rows, columns=REPORT_COLUMNS)
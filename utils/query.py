@@ -0,0 +1,221 @@
+import functools
+import hashlib
+import importlib
+import logging
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+from utils.paths import QUERY_DIR
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+# Engine for page aggregations (QUERY_BACKEND env var). "duckdb" and
+# "polars" scan Parquet: a file given as the source, or an export of the
+# frame written once per version. They are optional
+# (requirements-query.txt) and imported on first use; without the library
+# (or pyarrow) the pandas path is used. On the in-memory pages pandas is
+# the fastest up to ~1M rows (benchmarks/bench_query_backends.py).
+BACKENDS = ("pandas", "duckdb", "polars")
+QUERY_BACKEND = os.environ.get("QUERY_BACKEND", "pandas")
+
+# Parquet exports kept in .cache/query (QUERY_EXPORTS env var); the least
+# recently used are deleted past it
+QUERY_EXPORTS = int(os.environ.get("QUERY_EXPORTS", "16"))
+
+AGG_FUNCS = ("sum", "mean", "count", "size", "min", "max", "nunique")
+
+# Sums and means in float64, as pandas does for booleans (e.g. Churn_Bin)
+# and integers: AVG(BOOLEAN) does not bind in DuckDB
+_SQL_FUNCS = {
+    "sum": "SUM(CAST({} AS DOUBLE))",
+    "mean": "AVG(CAST({} AS DOUBLE))",
+    "count": "COUNT({})",
+    "size": "COUNT(*)",
+    "min": "MIN({})",
+    "max": "MAX({})",
+    "nunique": "COUNT(DISTINCT {})",
+}
+
+_warned = set()
+
+
+@functools.cache
+def _engine(backend):
+    """The duckdb/polars module, imported on first use (None if missing)."""
+    try:
+        return importlib.import_module(backend)
+    except ImportError:
+        return None
+
+
+def _check_spec(by, agg):
+    if not by:
+        raise ValueError("Informe ao menos uma coluna de agrupamento")
+    for out, (col, func) in agg.items():
+        if func not in AGG_FUNCS:
+            raise ValueError(f"Agregação não suportada em '{out}': {func}")
+
+
+def resolve_backend(backend=None):
+    """
+    Return the backend to use: `backend`, else QUERY_BACKEND, falling back
+    to "pandas" when the engine (or pyarrow, for the Parquet export) is missing.
+    """
+    backend = backend or QUERY_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de consulta desconhecido: {backend}")
+    if backend != "pandas" and (_engine(backend) is None or pyarrow is None):
+        if backend not in _warned:
+            logger.warning("Backend %s indisponível, usando pandas", backend)
+            _warned.add(backend)
+        return "pandas"
+    return backend
+
+
+def _prune_exports(keep):
+    exports = sorted(
+        QUERY_DIR.glob("*.parquet"), key=lambda p: p.stat().st_mtime, reverse=True
+    )
+    for path in exports[keep:]:
+        path.unlink(missing_ok=True)
+
+
+def _parquet_export(df, version):
+    """
+    Write df once per version as Parquet, for the Parquet engines.
+
+    The frame is already in memory here: the export lets DuckDB/Polars run
+    on it, it does not lift the RAM limit. For data larger than memory, pass
+    the Parquet file itself as the source of group_aggregate. Only the
+    QUERY_EXPORTS most recently used exports are kept.
+    """
+    if version is None:
+        raise ValueError("Informe a versão dos dados para exportá-los em Parquet")
+    name = hashlib.sha256(str(version).encode()).hexdigest()[:16]
+    path = QUERY_DIR / f"{name}.parquet"
+    if path.exists():
+        # Marks it as recently used for _prune_exports
+        os.utime(path)
+        return path
+    QUERY_DIR.mkdir(parents=True, exist_ok=True)
+    # Unique per thread: grid cells (build_figures) may export concurrently
+    tmp_path = path.with_suffix(f".parquet.{os.getpid()}.{threading.get_ident()}.tmp")
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    _prune_exports(QUERY_EXPORTS)
+    return path
+
+
+def _categorical_order(result, df, by):
+    """
+    Give the keys df's categorical dtypes and sort the groups as pandas does:
+    the engines order by label, pandas by category order (e.g. Ano_Mes).
+    """
+    dtypes = {
+        col: df[col].dtype
+        for col in by
+        if isinstance(df[col].dtype, pd.CategoricalDtype)
+    }
+    if not dtypes:
+        return result
+    return result.astype(dtypes).sort_values(by, ignore_index=True)
+
+
+def _pandas_aggregate(df, by, agg):
+    grouped = df.groupby(by, observed=True)
+    columns = {
+        out: grouped.size() if func == "size" else grouped[col].agg(func)
+        for out, (col, func) in agg.items()
+    }
+    return pd.DataFrame(columns).reset_index()
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _duckdb_aggregate(path, by, agg):
+    keys = ", ".join(_quote(col) for col in by)
+    exprs = ", ".join(
+        f"{_SQL_FUNCS[func].format(_quote(col))} AS {_quote(out)}"
+        for out, (col, func) in agg.items()
+    )
+    # pandas drops missing group keys
+    where = " AND ".join(f"{_quote(col)} IS NOT NULL" for col in by)
+    source = str(path).replace("'", "''")
+    query = (
+        f"SELECT {keys}, {exprs} FROM read_parquet('{source}') "
+        f"WHERE {where} GROUP BY {keys} ORDER BY {keys}"
+    )
+    with _engine("duckdb").connect() as con:
+        return con.execute(query).df()
+
+
+def _polars_aggregate(path, by, agg):
+    pl = _engine("polars")
+    funcs = {
+        "sum": lambda col: pl.col(col).cast(pl.Float64).sum(),
+        "mean": lambda col: pl.col(col).cast(pl.Float64).mean(),
+        "count": lambda col: pl.col(col).count(),
+        "size": lambda col: pl.len(),
+        "min": lambda col: pl.col(col).min(),
+        "max": lambda col: pl.col(col).max(),
+        "nunique": lambda col: pl.col(col).drop_nulls().n_unique(),
+    }
+    query = (
+        pl.scan_parquet(path)
+        .filter(pl.all_horizontal(pl.col(by).is_not_null()))
+        .group_by(by)
+        .agg([funcs[func](col).alias(out) for out, (col, func) in agg.items()])
+        .sort(by)
+    )
+    return query.collect().to_pandas()
+
+
+def group_aggregate(source, version, by, agg, backend=None):
+    """
+    Group `source` by `by` and aggregate, on the configured query backend.
+
+    Args:
+        source: Input frame, or the path of a Parquet file. A path is scanned
+            by DuckDB/Polars without loading it (pandas reads just the
+            needed columns), so it works for data larger than memory; a
+            frame is exported to Parquet once per `version` first.
+        version: Identifier of the source's content; keys the Parquet export
+            of a frame, so it is required for a frame on DuckDB/Polars.
+        by: Column or list of columns to group by.
+        agg: Named aggregation {output: (column, func)}, func in AGG_FUNCS
+            (the column is ignored for "size").
+        backend: "pandas", "duckdb" or "polars" (default: QUERY_BACKEND).
+
+    Returns one row per observed group, keys first, like
+    df.groupby(by).agg(**agg).reset_index(). Missing keys are dropped.
+    Groups are sorted by key; categorical keys of a frame keep their
+    category order on every backend, while a file's keys sort by value on
+    DuckDB/Polars.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    _check_spec(by, agg)
+
+    backend = resolve_backend(backend)
+    is_file = isinstance(source, (str, os.PathLike))
+    if backend == "pandas":
+        if is_file:
+            values = [col for col, func in agg.values() if func != "size"]
+            columns = list(dict.fromkeys(by + values))
+            source = pd.read_parquet(source, columns=columns)
+        return _pandas_aggregate(source, by, agg)
+
+    path = Path(source) if is_file else _parquet_export(source, version)
+    if backend == "duckdb":
+        result = _duckdb_aggregate(path, by, agg)
+    else:
+        result = _polars_aggregate(path, by, agg)
+    return result if is_file else _categorical_order(result, source, by)
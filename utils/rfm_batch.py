@@ -0,0 +1,218 @@
+"""
+Headless RFM scoring for batch jobs (e.g. the nightly CRM export).
+
+    python -m utils.rfm_batch --output rfm.parquet [--workers N] [--quantiles sketch]
+
+Customers are sharded by a hash of id_cliente across a process pool; each
+shard computes Recency, Frequency and Monetary for its customers, and the
+parent merges them to score against global quintile boundaries, so the
+output is the same as the RFM page's (utils.rfm.compute_rfm).
+
+With --quantiles sketch the quintile boundaries come from merged KLL
+sketches, but the parent still gathers the full per-customer table to score
+and write it: memory is O(customers) end to end, as in exact mode.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from utils.load_file import read_dataset, read_file
+from utils.paths import DATA_DIR
+from utils.rfm import RFMSketch, customer_rfm_metrics, score_rfm
+
+DEFAULT_TRANSACOES = "mercado_transacoes_pt.xlsx"
+DEFAULT_CLIENTES = "mercado_clientes_pt.xlsx"
+DEFAULT_RESUMO = "mercado_resumo_compras_pt.xlsx"
+
+REPORT_COLUMNS = ["Etapa", "Tempo (s)"]
+
+
+def read_input(name):
+    """
+    A Parquet or Feather/Arrow file (e.g. a snapshot) by path; a relative
+    name inside data/ through its snapshot (utils.load_file.read_dataset);
+    any other path parsed directly, so no snapshot is written next to it.
+    """
+    path = Path(name)
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    if path.suffix in (".arrow", ".feather"):
+        return pd.read_feather(path)
+    data_dir = DATA_DIR.resolve()
+    if not path.is_absolute() and (data_dir / path).resolve().is_relative_to(data_dir):
+        return read_dataset(name)
+    return read_file(path)
+
+
+def shard_codes(ids, n_shards):
+    """Stable shard number per row from a hash of id_cliente."""
+    ids = np.asarray(ids)
+    # Transactions carry float ids (NaN-able) and the summary int ids: hash
+    # one representation so a customer lands in the same shard in both
+    if np.issubdtype(ids.dtype, np.number):
+        ids = ids.astype(np.float64)
+    return (pd.util.hash_array(ids) % n_shards).astype(np.int64)
+
+
+def split_shards(df, codes, n_shards):
+    """Split df into n_shards frames, keeping the row order inside each."""
+    order = np.argsort(codes, kind="stable")
+    bounds = np.cumsum(np.bincount(codes, minlength=n_shards))[:-1]
+    return [df.take(rows) for rows in np.split(order, bounds)]
+
+
+def _score_shard(df_transacoes, df_merged, reference_date, sketch_k=None):
+    start = time.perf_counter()
+    rfm = customer_rfm_metrics(df_transacoes, df_merged, reference_date)
+    sketch = RFMSketch(sketch_k).update(rfm) if sketch_k else None
+    return rfm, sketch, time.perf_counter() - start
+
+
+def run_batch(
+    df_transacoes, df_merged, workers=None, shards=None, quantiles="exact", k=400
+):
+    """
+    Score every customer with transactions, sharding the per-customer work.
+
+    quantiles="exact" gathers R/F/M (three columns) and bins them with pd.qcut;
+    "sketch" merges the shards' KLL sketches into global boundaries instead.
+    Returns (rfm, report) with the time of each stage.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers
+    stages = []
+
+    def stage(name, began):
+        stages.append({"Etapa": name, "Tempo (s)": time.perf_counter() - began})
+
+    began = time.perf_counter()
+    # Global reference date, so every shard measures Recency the same way
+    reference_date = pd.to_datetime(
+        df_transacoes["data_transacao"]
+    ).max() + pd.Timedelta(days=1)
+    tx_shards = split_shards(
+        df_transacoes, shard_codes(df_transacoes["id_cliente"], shards), shards
+    )
+    merged_shards = split_shards(
+        df_merged, shard_codes(df_merged["id_cliente"], shards), shards
+    )
+    stage("Sharding", began)
+
+    began = time.perf_counter()
+    sketch_k = k if quantiles == "sketch" else None
+    args = (tx_shards, merged_shards, repeat(reference_date), repeat(sketch_k))
+    if workers == 1:
+        results = list(map(_score_shard, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_score_shard, *args))
+    stage(f"Métricas R/F/M ({shards} shards, {workers} processos)", began)
+
+    began = time.perf_counter()
+    # Back to id order, so F's rank(method="first") ties break as on the page
+    rfm = pd.concat([r for r, _, _ in results], ignore_index=True)
+    rfm = rfm.sort_values("id_cliente", kind="stable", ignore_index=True)
+    if quantiles == "sketch":
+        sketch = RFMSketch(k)
+        for _, shard_sketch, _ in results:
+            sketch.merge(shard_sketch)
+        codes = next(sketch.quintile_codes([rfm]))
+        rfm = score_rfm(rfm, codes)
+    elif quantiles == "exact":
+        rfm = score_rfm(rfm)
+    else:
+        raise ValueError(f"Modo de quantis desconhecido: {quantiles}")
+    stage("Quintis globais e segmentos", began)
+
+    shard_times = [seconds for _, _, seconds in results]
+    stages.append({"Etapa": "Shard mais lento", "Tempo (s)": max(shard_times)})
+    return rfm, pd.DataFrame(stages, columns=REPORT_COLUMNS)
+
+
+def write_output(rfm, path):
+    """Parquet or CSV, by the output file's extension."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".parquet":
+        rfm.to_parquet(path, index=False)
+    elif path.suffix == ".csv":
+        rfm.to_csv(path, index=False)
+    else:
+        raise ValueError(f"Formato de saída não suportado: {path.suffix}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Pontuação RFM em lote (segmentos para exportação ao CRM)."
+    )
+    inputs = (
+        "Nome relativo: arquivo em data/ (via snapshot); caminho absoluto ou "
+        "fora de data/: lido diretamente; também aceita .parquet/.arrow"
+    )
+    parser.add_argument("--transacoes", default=DEFAULT_TRANSACOES, help=inputs)
+    parser.add_argument("--clientes", default=DEFAULT_CLIENTES, help=inputs)
+    parser.add_argument("--resumo", default=DEFAULT_RESUMO, help=inputs)
+    parser.add_argument(
+        "--output", required=True, help="Arquivo de saída (.parquet ou .csv)"
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--shards", type=int, default=None)
+    parser.add_argument(
+        "--quantiles",
+        choices=["exact", "sketch"],
+        default="exact",
+        help=(
+            "sketch: limites dos quintis por sketches KLL mesclados; a tabela "
+            "por cliente ainda é reunida inteira no processo principal, então "
+            "a memória continua O(clientes)"
+        ),
+    )
+    args = parser.parse_args(argv)
+
+    total_start = time.perf_counter()
+    began = time.perf_counter()
+    df_transacoes = read_input(args.transacoes)
+    df_merged = pd.merge(
+        read_input(args.clientes), read_input(args.resumo), on="id_cliente", how="left"
+    )
+    read_seconds = time.perf_counter() - began
+
+    rfm, report = run_batch(
+        df_transacoes,
+        df_merged,
+        workers=args.workers,
+        shards=args.shards,
+        quantiles=args.quantiles,
+    )
+
+    began = time.perf_counter()
+    write_output(rfm, args.output)
+    write_seconds = time.perf_counter() - began
+    total = time.perf_counter() - total_start
+
+    report = pd.concat(
+        [
+            pd.DataFrame([{"Etapa": "Leitura", "Tempo (s)": read_seconds}]),
+            report,
+            pd.DataFrame([{"Etapa": "Escrita", "Tempo (s)": write_seconds}]),
+        ],
+        ignore_index=True,
+    )
+    print(report.to_string(index=False, float_format="{:.3f}".format))
+    print(
+        f"\n{len(rfm):,} clientes e {len(df_transacoes):,} transações em {total:.2f}s "
+        f"({len(rfm) / total:,.0f} clientes/s, "
+        f"{len(df_transacoes) / total:,.0f} transações/s) -> {args.output}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
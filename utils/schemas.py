@@ -0,0 +1,92 @@
+# Column types for each dataset in data/, applied by utils.load_file at parse time.
+#
+# - "category" for low-cardinality text (segments, states, Sim/Nao answers)
+# - int8/int16 only where the domain bounds the range (ages, years, months
+#   in a 12-month window, children); amounts, counts and tenures that grow
+#   with the export are int32. float32 only where it keeps the displayed
+#   precision (monetary values with cents stay float64)
+# - "bool" for binary flags, mapped with BOOL_VALUES into pandas' nullable
+#   boolean so a missing answer stays <NA> instead of becoming False
+
+BOOL_VALUES = {"Sim": True, "Nao": False, "Não": False, 1: True, 0: False}
+
+DATASET_SCHEMAS = {
+    "retail.csv": {
+        "Segmento": "category",
+        "Pais": "category",
+        "Cidade": "category",
+        "Estado": "category",
+        "Categoria": "category",
+        "SubCategoria": "category",
+    },
+    "bank_credit_card_cancellation.csv": {
+        "Categoria": "category",
+        "Idade": "int8",
+        "Sexo": "category",
+        "Dependentes": "int8",
+        "Educação": "category",
+        "Estado Civil": "category",
+        "Faixa Salarial Anual": "category",
+        "Categoria Cartão": "category",
+        "Meses como Cliente": "int16",
+        "Produtos Contratados": "int8",
+        "Inatividade 12m": "int8",
+        "Contatos 12m": "int16",
+        "Limite Consumido": "int32",
+        "Mudanças Transacoes_Q4_Q1": "float32",
+        "Valor Transacoes 12m": "int32",
+        "Qtde Transacoes 12m": "int32",
+        "Mudança Qtde Transações_Q4_Q1": "float32",
+        "Taxa de Utilização Cartão": "float32",
+    },
+    "cancelamentos_servico.csv": {
+        "Genero": "category",
+        "Aposentado": "bool",
+        "Casado": "category",
+        "Dependentes": "category",
+        "MesesComoCliente": "int16",
+        "ServicoTelefone": "category",
+        "MultiplasLinhas": "category",
+        "ServicoInternet": "category",
+        "ServicoSegurancaOnline": "category",
+        "ServicoBackupOnline": "category",
+        "ProtecaoEquipamento": "category",
+        "ServicoSuporteTecnico": "category",
+        "ServicoStreamingTV": "category",
+        "ServicoFilmes": "category",
+        "TipoContrato": "category",
+        "FaturaDigital": "category",
+        "FormaPagamento": "category",
+        "Churn": "bool",
+    },
+    "mercado_clientes_pt.xlsx": {
+        "id_cliente": "int32",
+        "ano_nascimento": "int16",
+        "nivel_educacao": "category",
+        "estado_civil": "category",
+        "salario_anual_dolar": "float32",
+        "criancas_ate_dez_anos": "int8",
+        "criancas_mais_dez_anos": "int8",
+        "resposta_campanha": "bool",
+    },
+    "mercado_resumo_compras_pt.xlsx": {
+        "id_cliente": "int32",
+        "total_vinho": "int32",
+        "total_frutas": "int32",
+        "total_carnes": "int32",
+        "total_peixes": "int32",
+        "total_doces": "int32",
+        "total_outros": "int32",
+    },
+    "mercado_transacoes_pt.xlsx": {
+        "id_transacao": "int32",
+        "lugar_transacao": "category",
+    },
+}
+
+
+def get_schema(file_name):
+    """
+    Return the declared column types for a dataset (empty if none).
+    """
+    return DATASET_SCHEMAS.get(file_name, {})
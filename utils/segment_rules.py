@@ -0,0 +1,222 @@
+import itertools
+import json
+import operator
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from utils.paths import RULES_DIR
+from utils.rfm import N_QUANTILES
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+SCORE_COLUMNS = {"R": "R_Score", "F": "F_Score", "M": "M_Score"}
+
+_OPERATORS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    "==": operator.eq,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+
+class RuleSetError(ValueError):
+    """Invalid segment rule definition (syntax, gaps or overlaps)."""
+
+
+def _parse_condition(score, spec):
+    """
+    Predicates (score, op, value) for one entry of a rule's `when`:
+    ">=4" style strings, a bare score (equality) or an inclusive [min, max].
+    """
+    if score not in SCORE_COLUMNS:
+        raise RuleSetError(f"Score desconhecido: {score} (use R, F ou M)")
+    if isinstance(spec, list) and len(spec) == 2:
+        return [(score, ">=", int(spec[0])), (score, "<=", int(spec[1]))]
+    if isinstance(spec, int):
+        return [(score, "==", spec)]
+    if isinstance(spec, str):
+        text = spec.replace(" ", "")
+        for op in _OPERATORS:
+            if text.startswith(op) and text[len(op) :].isdigit():
+                return [(score, op, int(text[len(op) :]))]
+    raise RuleSetError(f"Condição inválida para {score}: {spec!r}")
+
+
+def _predicate_mask(scores, predicate, cache):
+    # Identical predicates across rules (and rule sets) are evaluated once
+    if predicate not in cache:
+        score, op, value = predicate
+        cache[predicate] = _OPERATORS[op](scores[score], value)
+    return cache[predicate]
+
+
+class SegmentRuleSet:
+    """
+    Segment rules compiled to predicate lists, evaluated as boolean masks
+    with np.select (first matching rule wins, like the if/elif chain).
+    """
+
+    def __init__(self, name, rules, description="", exclusive=False):
+        self.name = name
+        self.description = description
+        self.exclusive = exclusive
+        self.rule_segments = [segment for segment, _ in rules]
+        self.rule_predicates = [predicates for _, predicates in rules]
+        # Segment categories in order of first appearance
+        self.segments = list(dict.fromkeys(self.rule_segments))
+        self._rule_codes = np.array(
+            [self.segments.index(s) for s in self.rule_segments], dtype=np.int8
+        )
+        self.overlaps = self._validate()
+
+    def _masks(self, scores, cache):
+        size = len(next(iter(scores.values())))
+        return [
+            np.logical_and.reduce(
+                [_predicate_mask(scores, p, cache) for p in predicates]
+            )
+            if predicates
+            else np.ones(size, dtype=bool)
+            for predicates in self.rule_predicates
+        ]
+
+    def _validate(self):
+        """
+        Check the rules over every (R, F, M) score combination: every cell
+        must be matched (no gaps) and every rule must win somewhere (no rule
+        fully shadowed by earlier ones). Overlaps between rules are returned,
+        and rejected when the set is declared `exclusive`.
+        """
+        grid = np.array(
+            list(itertools.product(range(1, N_QUANTILES + 1), repeat=3))
+        ).T
+        scores = dict(zip(SCORE_COLUMNS, grid))
+        masks = np.array(self._masks(scores, {}))
+
+        gaps = ~masks.any(axis=0)
+        if gaps.any():
+            cells = [f"R={r} F={f} M={m}" for r, f, m in grid.T[gaps][:5]]
+            raise RuleSetError(
+                f"{self.name}: {gaps.sum()} combinações sem segmento "
+                f"(ex.: {', '.join(cells)})"
+            )
+
+        winner = masks.argmax(axis=0)
+        for i, segment in enumerate(self.rule_segments):
+            if not (winner == i).any():
+                raise RuleSetError(
+                    f"{self.name}: a regra {i + 1} ({segment}) nunca é aplicada; "
+                    "regras anteriores cobrem todos os seus casos"
+                )
+
+        overlaps = []
+        for i, j in itertools.combinations(range(len(masks)), 2):
+            shared = int((masks[i] & masks[j]).sum())
+            if shared:
+                overlaps.append((self.rule_segments[i], self.rule_segments[j], shared))
+        if self.exclusive and overlaps:
+            a, b, shared = overlaps[0]
+            raise RuleSetError(
+                f"{self.name}: regras exclusivas se sobrepõem "
+                f"({a} e {b} em {shared} combinações)"
+            )
+        return overlaps
+
+    def evaluate(self, scores, cache=None):
+        """
+        Segment per row as an ordered Categorical. `scores` maps "R"/"F"/"M"
+        to integer score arrays; `cache` shares predicate masks across calls.
+        """
+        masks = self._masks(scores, {} if cache is None else cache)
+        codes = np.select(masks, self._rule_codes, default=-1)
+        return pd.Categorical.from_codes(codes, categories=self.segments, ordered=True)
+
+
+def compile_rule_set(definition):
+    """
+    Compile a rule set definition:
+
+        {"name": ..., "exclusive": false,
+         "rules": [{"segment": "Campeões", "when": {"R": ">=5", "F": ">=5"}},
+                   ...,
+                   {"segment": "Hibernando", "when": {}}]}
+
+    Conditions accept ">=", "<=", "==", ">", "<" strings, a bare score or an
+    inclusive [min, max]; an empty `when` matches everything.
+    """
+    try:
+        rules = [
+            (
+                rule["segment"],
+                [
+                    predicate
+                    for score, spec in rule.get("when", {}).items()
+                    for predicate in _parse_condition(score, spec)
+                ],
+            )
+            for rule in definition["rules"]
+        ]
+    except (KeyError, TypeError, AttributeError) as e:
+        raise RuleSetError(f"Definição de regras inválida: {e}") from e
+    if not rules:
+        raise RuleSetError("O conjunto de regras está vazio")
+    return SegmentRuleSet(
+        definition.get("name", "Regras"),
+        rules,
+        description=definition.get("description", ""),
+        exclusive=bool(definition.get("exclusive", False)),
+    )
+
+
+def load_rule_set(path):
+    """Compile a rule set from a JSON or (with PyYAML installed) YAML file."""
+    path = Path(path)
+    with open(path, encoding="utf-8") as f:
+        if path.suffix in (".yaml", ".yml"):
+            if yaml is None:
+                raise RuleSetError(f"PyYAML não instalado para ler {path.name}")
+            definition = yaml.safe_load(f)
+        else:
+            definition = json.load(f)
+    definition.setdefault("name", path.stem)
+    return compile_rule_set(definition)
+
+
+def available_rule_sets(rules_dir=RULES_DIR):
+    """
+    Compile every rule file in rules_dir. Returns (rule_sets, errors): rule
+    sets by name, and error messages for files that failed validation.
+    """
+    suffixes = {".json"} | ({".yaml", ".yml"} if yaml is not None else set())
+    rule_sets, errors = {}, []
+    for path in sorted(Path(rules_dir).glob("*")):
+        if path.suffix not in suffixes:
+            continue
+        try:
+            rule_set = load_rule_set(path)
+        except (RuleSetError, ValueError, OSError) as e:
+            errors.append(f"{path.name}: {e}")
+        else:
+            rule_sets[rule_set.name] = rule_set
+    return rule_sets, errors
+
+
+def score_rule_sets(rfm, rule_sets):
+    """
+    Segment the same RFM table with several rule sets in one pass: the
+    score arrays are extracted once and identical predicates are shared
+    between rule sets. Returns one Categorical column per rule set.
+    """
+    scores = {
+        key: np.asarray(rfm[col], dtype=np.int8) for key, col in SCORE_COLUMNS.items()
+    }
+    cache = {}
+    return pd.DataFrame(
+        {name: rule_set.evaluate(scores, cache) for name, rule_set in rule_sets.items()},
+        index=rfm.index,
+    )
@@ -0,0 +1,94 @@
+import math
+
+import numpy as np
+
+
+class KLLSketch:
+    """
+    Mergeable streaming quantile sketch (Karnin, Lang & Liberty, 2016).
+
+    Items live in compactors; an item at level h stands for 2**h inputs. When
+    a level overflows it is sorted and every other item (random offset) moves
+    one level up, so memory stays O(k log(n / k)) while the rank error of any
+    quantile is around 1.7 / k with high probability. Sketches built on
+    separate shards merge into a sketch of the union.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def retained(self):
+        """Number of items held in memory."""
+        return sum(len(items) for items in self.levels)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # Pairs are halved (weight is conserved); an odd leftover stays
+                keep = items[len(items) - len(items) % 2 :]
+                paired = items[: len(items) - len(keep)]
+                promoted = paired[self._rng.integers(2) :: 2]
+                self.levels[level + 1] = np.concatenate(
+                    [self.levels[level + 1], promoted]
+                )
+                self.levels[level] = keep
+            level += 1
+
+    def update(self, values):
+        """Add a batch of values (NaN is ignored). Returns the sketch."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.n += len(values)
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold another sketch (e.g. from another shard) into this one."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(len(lvl), 2**h, dtype=np.int64) for h, lvl in enumerate(self.levels)]
+        )
+        order = np.argsort(items, kind="stable")
+        return items[order], np.concatenate([[0], np.cumsum(weights[order])])
+
+    def rank(self, values, inclusive=False):
+        """Estimated number of inputs < value (<= value when inclusive)."""
+        items, cum_weights = self._weighted_items()
+        side = "right" if inclusive else "left"
+        return cum_weights[np.searchsorted(items, values, side=side)]
+
+    def quantile(self, qs):
+        """
+        Estimated quantiles, targeting the same position as np.quantile's
+        default (q * (n - 1) in the sorted input).
+        """
+        items, cum_weights = self._weighted_items()
+        targets = np.asarray(qs, dtype=np.float64) * (self.n - 1)
+        idx = np.searchsorted(cum_weights[1:], targets, side="right")
+        return items[np.minimum(idx, len(items) - 1)]
@@ -1,3 +1,5 @@
+from contextlib import contextmanager
+
 import streamlit as st
 
 
@@ -56,3 +58,105 @@ def add_back_to_top():
         """,
         unsafe_allow_html=True,
     )
+
+
+def show_pipeline_report(report):
+    """
+    Shows the preprocessing steps with their row counts, timing and cache reuse.
+    """
+    st.dataframe(
+        report.style.format({"Tempo (ms)": "{:.1f}"}),
+        use_container_width=True,
+        hide_index=True,
+    )
+    st.caption(
+        "Tempo medido na execução original de cada etapa; 'Cache' indica que o resultado foi reaproveitado."
+    )
+
+
+def show_aggregate_stats(stats):
+    """
+    Shows the shared aggregation cache counters (see utils.aggregates).
+    """
+    if stats.empty:
+        st.caption("Nenhuma agregação calculada ainda neste processo.")
+        return
+    st.dataframe(
+        stats.style.format(
+            {"Tempo (ms)": "{:.1f}", "Economizado (ms)": "{:.1f}", "Memória (KB)": "{:.1f}"}
+        ),
+        use_container_width=True,
+        hide_index=True,
+    )
+    st.caption(
+        "Agregações compartilhadas entre sessões e páginas; 'Economizado' soma o tempo de cálculo evitado pelos acertos."
+    )
+
+
+def show_figure_stats(stats):
+    """
+    Shows the hit rates of the figure cache per chart (see utils.figures).
+    """
+    if stats.empty:
+        st.caption("Nenhum gráfico em cache ainda neste processo.")
+        return
+    st.dataframe(
+        stats.style.format({"Taxa de Acerto": "{:.0%}"}),
+        use_container_width=True,
+        hide_index=True,
+    )
+    st.caption(
+        "Figuras reaproveitadas da memória ou do disco em vez de reconstruídas a cada interação."
+    )
+
+
+def lazy_tabs(labels, key):
+    """
+    Tab bar that only runs the selected section.
+
+    st.tabs executes the code of every tab on each rerun; here the page
+    checks the returned label and renders just that section, so the cost of
+    a rerun is the cost of what is on screen. The selection is kept in
+    st.session_state under `key`.
+    """
+    return st.radio(
+        "Seção", labels, horizontal=True, key=key, label_visibility="collapsed"
+    )
+
+
+@contextmanager
+def lazy_expander(label, key, expanded=False):
+    """
+    st.expander whose content is only computed on demand.
+
+    Yields the state of a "Carregar" toggle inside the expander (on by
+    default when `expanded`); the caller renders the section only when it
+    is True. Once switched on, the toggle stays on for the session, also
+    after visiting other sections, and the figures/aggregations it draws
+    come from the shared caches on later reruns.
+    """
+    # Streamlit drops a widget's state when it is not rendered (another
+    # lazy_tabs section), so the choice is also kept under its own key
+    state_key = f"_{key}_carregado"
+    with st.expander(label, expanded=expanded):
+        load = st.toggle(
+            "Carregar", value=st.session_state.get(state_key, expanded), key=key
+        )
+        st.session_state[state_key] = load
+        yield load
+
+
+def show_snapshot_stats(stats):
+    """
+    Shows the dataset snapshot counters of this process (see utils.load_file).
+    """
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Acertos", stats["hits"])
+    col2.metric("Falhas", stats["misses"])
+    col3.metric("Reconstruções", stats["rebuilds"])
+    col4.metric("Taxa de Acerto", f"{stats['hit_rate']:.0%}")
+    st.caption(
+        "Leituras de datasets servidas pelo snapshot colunar em vez de "
+        "reprocessar o CSV/XLSX; 'Reconstruções' conta snapshots refeitos "
+        "porque a fonte mudou."
+    )
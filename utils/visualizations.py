@@ -1,5 +1,14 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
 import streamlit as st
 import plotly.express as px
+import plotly.graph_objects as go
+from utils.aggregates import COUNT_COL, cached_aggregate, groupby_agg
+from utils.figures import cached_figure
 
 # Paleta de cores padronizada (Baseada no Bootstrap / Material Design)
 # Azul (Primary), Indigo, Roxo, Rosa, Vermelho, Laranja, Amarelo, Verde, Teal, Ciano
@@ -17,17 +26,22 @@ COLOR_PALETTE = [
 ]
 
 
-def plot_pie(df, names, height=350, title=None):
+def plot_pie(df, names, height=350, title=None, version=None):
     """
     Renderiza um gráfico de pizza.
     """
-    fig = px.pie(
-        df,
-        names=names,
-        title=title,
-        color_discrete_sequence=COLOR_PALETTE,
-    )
-    fig.update_layout(height=height)
+
+    def build():
+        fig = px.pie(
+            df,
+            names=names,
+            title=title,
+            color_discrete_sequence=COLOR_PALETTE,
+        )
+        fig.update_layout(height=height)
+        return fig
+
+    fig = cached_figure(version, "plot_pie", (names, height, title), build)
     st.plotly_chart(fig, use_container_width=True)
 
 
@@ -42,56 +56,333 @@ def plot_bar(
     labels=None,
     show_legend=True,
     color_map=None,
+    version=None,
 ):
     """
     Renderiza um gráfico de barras.
+
+    Com `version` (identificador do conteúdo de df), a figura é reaproveitada
+    do cache de figuras (utils.figures); o mesmo vale para os demais gráficos.
     """
-    fig = px.bar(
+    fig = bar_figure(
         df,
-        x=x_col,
-        y=y_col,
-        orientation=orientation,
+        x_col,
+        y_col,
         title=title,
+        orientation=orientation,
         color=color,
         height=height,
-        color_discrete_sequence=COLOR_PALETTE,
         labels=labels,
-        color_discrete_map=color_map,
+        show_legend=show_legend,
+        color_map=color_map,
+        version=version,
     )
-    if not show_legend:
-        fig.update_layout(showlegend=False)
-
     st.plotly_chart(fig, use_container_width=True)
 
 
-def plot_histogram(
+def bar_figure(
     df,
-    x,
-    color=None,
+    x_col,
+    y_col,
     title=None,
-    barmode="group",
-    show_yaxis_title=True,
+    orientation="v",
+    color=None,
+    height=350,
     labels=None,
+    show_legend=True,
     color_map=None,
+    version=None,
 ):
     """
-    Renderiza um histograma.
+    Figura de plot_bar sem renderizá-la (p.ex. para build_figures).
     """
-    fig = px.histogram(
-        df,
+
+    def build():
+        fig = px.bar(
+            df,
+            x=x_col,
+            y=y_col,
+            orientation=orientation,
+            title=title,
+            color=color,
+            height=height,
+            color_discrete_sequence=COLOR_PALETTE,
+            labels=labels,
+            color_discrete_map=color_map,
+        )
+        if not show_legend:
+            fig.update_layout(showlegend=False)
+        return fig
+
+    spec = (x_col, y_col, title, orientation, color, height, labels, show_legend, color_map)
+    return cached_figure(version, "plot_bar", spec, build)
+
+
+# Número de barras dos histogramas agregados no servidor
+HISTOGRAM_BINS = 30
+
+
+def _is_binnable(values):
+    # Numéricas (exceto booleanas) e datas são agrupadas em faixas
+    if pd.api.types.is_bool_dtype(values):
+        return False
+    return pd.api.types.is_numeric_dtype(
+        values
+    ) or pd.api.types.is_datetime64_any_dtype(values)
+
+
+def histogram_counts(df, x, color=None, bins=HISTOGRAM_BINS):
+    """
+    Contagens de um histograma calculadas com NumPy, por grupo de `color`.
+
+    Colunas numéricas e de data são divididas em `bins` faixas de mesma
+    largura (x é o centro da faixa, "Faixa" o intervalo); as demais são
+    contadas por valor. Retorna só as barras não vazias, com a contagem em
+    "Contagem": o tamanho do resultado depende do número de faixas ou
+    categorias, não de linhas.
+    """
+    if color == x:
+        # A própria coluna x serve de cor no resultado
+        color = None
+    values = df[x]
+    if not _is_binnable(values):
+        keys = [x] if color is None else [x, color]
+        return df.groupby(keys, observed=True).size().reset_index(name=COUNT_COL)
+
+    # Datas viram nanossegundos; as faixas voltam a ser datas no resultado
+    is_datetime = pd.api.types.is_datetime64_any_dtype(values)
+    valid = values.notna().to_numpy()
+    if is_datetime:
+        values = values.to_numpy(dtype="datetime64[ns]").view(np.int64)
+        values = values.astype(np.float64)
+    else:
+        values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    if color is not None:
+        color_codes, color_values = pd.factorize(df[color], sort=True)
+        valid = valid & (color_codes >= 0)
+    else:
+        color_codes, color_values = np.zeros(len(values), dtype=np.int64), [None]
+
+    if valid.any():
+        edges = np.histogram_bin_edges(values[valid], bins=bins)
+    else:
+        edges = np.arange(2.0)
+    n_bins = len(edges) - 1
+    idx = np.searchsorted(edges, values[valid], side="right") - 1
+    # O limite superior entra na última faixa, como em np.histogram
+    idx = np.clip(idx, 0, n_bins - 1)
+    flat = np.bincount(
+        color_codes[valid] * n_bins + idx, minlength=len(color_values) * n_bins
+    )
+
+    group, bin_idx = np.divmod(np.arange(len(flat)), n_bins)
+    present = flat > 0
+    group, bin_idx = group[present], bin_idx[present]
+    low, high = edges[bin_idx], edges[bin_idx + 1]
+    centers = (low + high) / 2
+    if is_datetime:
+        centers = pd.to_datetime(centers.astype(np.int64))
+        low = pd.to_datetime(low.astype(np.int64)).strftime("%d/%m/%Y")
+        high = pd.to_datetime(high.astype(np.int64)).strftime("%d/%m/%Y")
+    else:
+        low, high = [f"{v:.4g}" for v in low], [f"{v:.4g}" for v in high]
+    result = pd.DataFrame(
+        {
+            x: centers,
+            COUNT_COL: flat[present],
+            "Faixa": [f"{a} – {b}" for a, b in zip(low, high)],
+        }
+    )
+    if color is not None:
+        result.insert(0, color, np.asarray(color_values)[group])
+    return result
+
+
+def _histogram_figure(counts, x, color, title, barmode, labels, color_map):
+    labels = dict(labels or {})
+    if "count" in labels:
+        labels.setdefault(COUNT_COL, labels["count"])
+    fig = px.bar(
+        counts,
         x=x,
+        y=COUNT_COL,
         color=color,
         title=title,
         barmode=barmode,
+        hover_data=["Faixa"] if "Faixa" in counts else None,
         color_discrete_sequence=COLOR_PALETTE,
         labels=labels,
         color_discrete_map=color_map,
     )
-    if not show_yaxis_title:
-        fig.update_layout(yaxis_title=None)
+    if "Faixa" in counts:
+        fig.update_layout(bargap=0.05)
+    return fig
+
+
+def plot_histogram(
+    df,
+    x,
+    color=None,
+    title=None,
+    barmode="group",
+    show_yaxis_title=True,
+    labels=None,
+    color_map=None,
+    binned=True,
+    bins=HISTOGRAM_BINS,
+    version=None,
+):
+    """
+    Renderiza um histograma.
+
+    Por padrão as contagens são calculadas no servidor (histogram_counts) e
+    só as barras vão ao navegador; com binned=False, todas as linhas são
+    enviadas ao px.histogram.
+    """
+
+    def build():
+        if binned:
+            fig = _histogram_figure(
+                histogram_counts(df, x, color, bins),
+                x,
+                color,
+                title,
+                barmode,
+                labels,
+                color_map,
+            )
+        else:
+            fig = px.histogram(
+                df,
+                x=x,
+                color=color,
+                title=title,
+                barmode=barmode,
+                color_discrete_sequence=COLOR_PALETTE,
+                labels=labels,
+                color_discrete_map=color_map,
+            )
+        if not show_yaxis_title:
+            fig.update_layout(yaxis_title=None)
+        return fig
+
+    spec = (x, color, title, barmode, show_yaxis_title, labels, color_map, binned, bins)
+    fig = cached_figure(version, "plot_histogram", spec, build)
     st.plotly_chart(fig, use_container_width=True)
 
 
+# Outliers enviados por caixa no modo resumido (os extremos sempre entram)
+BOX_MAX_OUTLIERS = 50
+
+
+def box_stats(df, x, y, max_outliers=BOX_MAX_OUTLIERS, seed=0):
+    """
+    Estatísticas de boxplot de `y` por grupo de `x`, numa passada vetorizada.
+
+    Ordena os valores uma vez por (grupo, valor) e tira de cada grupo os
+    quartis (interpolação linear, como no pandas), as cercas (valores mais
+    extremos dentro de 1,5 IQR) e até `max_outliers` outliers, sempre com o
+    menor e o maior. Retorna (stats, outliers): uma linha por grupo e os
+    pontos de outlier amostrados.
+    """
+    values = df[y].to_numpy(dtype=np.float64, na_value=np.nan)
+    valid = ~np.isnan(values) & df[x].notna().to_numpy()
+    codes, groups = pd.factorize(df[x][valid], sort=True)
+    values = values[valid]
+    if not len(values):
+        columns = [x, "q1", "median", "q3", "lowerfence", "upperfence", "n", "outliers"]
+        return pd.DataFrame(columns=columns), pd.DataFrame(columns=[x, y])
+
+    order = np.lexsort((values, codes))
+    sorted_values, sorted_codes = values[order], codes[order]
+    sizes = np.bincount(codes, minlength=len(groups))
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    def quantile(q):
+        pos = starts + q * (sizes - 1)
+        low = np.floor(pos).astype(np.int64)
+        high = np.ceil(pos).astype(np.int64)
+        frac = pos - low
+        return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * frac
+
+    q1, median, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    iqr = q3 - q1
+    inside = (sorted_values >= (q1 - 1.5 * iqr)[sorted_codes]) & (
+        sorted_values <= (q3 + 1.5 * iqr)[sorted_codes]
+    )
+    lower = np.minimum.reduceat(np.where(inside, sorted_values, np.inf), starts)
+    upper = np.maximum.reduceat(np.where(inside, sorted_values, -np.inf), starts)
+
+    # Amostra de outliers por grupo: prioridade aleatória, extremos primeiro
+    out_idx = np.flatnonzero(~inside)
+    out_codes = sorted_codes[out_idx]
+    priority = np.random.default_rng(seed).random(len(out_idx))
+    if len(out_idx):
+        boundary = out_codes[1:] != out_codes[:-1]
+        priority[np.concatenate(([True], boundary))] = -1
+        priority[np.concatenate((boundary, [True]))] = -1
+    ranked = np.lexsort((priority, out_codes))
+    first = np.searchsorted(out_codes[ranked], out_codes[ranked], side="left")
+    keep = out_idx[ranked[np.arange(len(ranked)) - first < max_outliers]]
+
+    stats = pd.DataFrame(
+        {
+            x: groups,
+            "q1": q1,
+            "median": median,
+            "q3": q3,
+            "lowerfence": lower,
+            "upperfence": upper,
+            "n": sizes,
+            "outliers": np.bincount(out_codes, minlength=len(groups)),
+        }
+    )
+    outliers = pd.DataFrame(
+        {x: np.asarray(groups)[sorted_codes[keep]], y: sorted_values[keep]}
+    )
+    return stats, outliers
+
+
+def _box_figure(stats, outliers, x, y, title=None, labels=None, color_map=None):
+    labels = labels or {}
+    color_map = color_map or {}
+    fig = go.Figure()
+    for i, (_, row) in enumerate(stats.iterrows()):
+        group = row[x]
+        color = color_map.get(group, COLOR_PALETTE[i % len(COLOR_PALETTE)])
+        fig.add_trace(
+            go.Box(
+                x=[group],
+                q1=[row["q1"]],
+                median=[row["median"]],
+                q3=[row["q3"]],
+                lowerfence=[row["lowerfence"]],
+                upperfence=[row["upperfence"]],
+                name=str(group),
+                marker_color=color,
+                boxpoints=False,
+            )
+        )
+        points = outliers.loc[outliers[x] == group, y]
+        if len(points):
+            fig.add_trace(
+                go.Scatter(
+                    x=[group] * len(points),
+                    y=points,
+                    mode="markers",
+                    marker=dict(color=color, size=4),
+                    name=str(group),
+                    showlegend=False,
+                )
+            )
+    fig.update_layout(
+        title=title,
+        xaxis_title=labels.get(x, x),
+        yaxis_title=labels.get(y, y),
+    )
+    return fig
+
+
 def plot_boxplot(
     df,
     x,
@@ -101,39 +392,194 @@ def plot_boxplot(
     show_xaxis_title=True,
     color_map=None,
     labels=None,
+    summary=True,
+    version=None,
 ):
     """
     Renderiza um boxplot.
+
+    Por padrão os quartis, cercas e uma amostra de outliers são calculados
+    no servidor (box_stats) e só as caixas vão ao navegador; com
+    summary=False (ou `color` diferente de `x`), todas as linhas são
+    enviadas ao px.box.
     """
-    fig = px.box(
-        df,
-        x=x,
-        y=y,
-        color=color,
-        title=title,
-        color_discrete_sequence=COLOR_PALETTE,
-        color_discrete_map=color_map,
-        labels=labels,
-    )
-    if not show_xaxis_title:
-        fig.update_layout(xaxis_title=None)
+
+    def build():
+        if summary and color in (None, x):
+            stats, outliers = box_stats(df, x, y)
+            fig = _box_figure(stats, outliers, x, y, title, labels, color_map)
+        else:
+            fig = px.box(
+                df,
+                x=x,
+                y=y,
+                color=color,
+                title=title,
+                color_discrete_sequence=COLOR_PALETTE,
+                color_discrete_map=color_map,
+                labels=labels,
+            )
+        if not show_xaxis_title:
+            fig.update_layout(xaxis_title=None)
+        return fig
+
+    spec = (x, y, color, title, show_xaxis_title, color_map, labels, summary)
+    fig = cached_figure(version, "plot_boxplot", spec, build)
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def plot_sunburst(nodes, values, color=None, height=600, title=None, version=None):
+    """
+    Renderiza um sunburst a partir de nós já agregados (id, parent, label),
+    como os de utils.cube.hierarchy: o plotly não reagrupa as linhas.
+    """
+
+    def build():
+        fig = px.sunburst(
+            nodes,
+            ids="id",
+            parents="parent",
+            names="label",
+            values=values,
+            color=color,
+            branchvalues="total",
+            title=title,
+            color_discrete_sequence=COLOR_PALETTE,
+        )
+        fig.update_layout(height=height)
+        return fig
+
+    fig = cached_figure(version, "plot_sunburst", (values, color, height, title), build)
+    st.plotly_chart(fig, use_container_width=True)
+
+
+# Acima deste número de pontos, plot_scatter agrega no servidor em vez de
+# enviar cada linha ao navegador
+SCATTER_MAX_POINTS = 20_000
+
+
+def bin_2d(df, x, y, color=None, value=None, bins=40):
+    """
+    Agrega df numa grade bins x bins sobre (x, y), por grupo de `color`.
+
+    Retorna uma linha por célula não vazia com o centro da célula em x/y,
+    a contagem ("Contagem") e a média de `value` ("Média"), se informado.
+    Linhas com x ou y ausente ficam de fora.
+    """
+    columns = {
+        col: df[col].to_numpy(dtype=np.float64, na_value=np.nan) for col in (x, y)
+    }
+    valid = ~(np.isnan(columns[x]) | np.isnan(columns[y]))
+    keys = {}
+    for col, values in columns.items():
+        values = values[valid]
+        if not len(values):
+            keys[col] = values
+            continue
+        low, high = values.min(), values.max()
+        width = (high - low) / bins or 1.0
+        idx = np.clip(((values - low) // width).astype(np.int64), 0, bins - 1)
+        keys[col] = low + (idx + 0.5) * width
+
+    grouped = pd.DataFrame(keys)
+    if color is not None:
+        grouped[color] = df[color].to_numpy()[valid]
+    aggs = {"Contagem": (x, "size")}
+    if value is not None:
+        grouped["_value"] = df[value].to_numpy()[valid]
+        aggs["Média"] = ("_value", "mean")
+
+    group_cols = ([color] if color is not None else []) + [x, y]
+    return grouped.groupby(group_cols, observed=True).agg(**aggs).reset_index()
+
+
+def plot_scatter(
+    df,
+    x,
+    y,
+    color=None,
+    size=None,
+    hover_data=None,
+    title=None,
+    labels=None,
+    color_map=None,
+    max_points=SCATTER_MAX_POINTS,
+    bins=40,
+    version=None,
+):
+    """
+    Renderiza um gráfico de dispersão.
+
+    Até `max_points` linhas, desenha cada ponto com WebGL. Acima disso, agrega
+    x/y numa grade no servidor (bin_2d): cada marcador é uma célula por grupo
+    de `color`, com tamanho pela contagem e a média de `size` no hover, de
+    modo que o volume enviado ao navegador não cresce com o número de linhas.
+    """
+    binned = len(df) > max_points
+
+    def build():
+        if not binned:
+            return px.scatter(
+                df,
+                x=x,
+                y=y,
+                color=color,
+                size=size,
+                hover_data=hover_data,
+                title=title,
+                labels=labels,
+                color_discrete_sequence=COLOR_PALETTE,
+                color_discrete_map=color_map,
+                render_mode="webgl",
+            )
+
+        df_bins = bin_2d(df, x, y, color=color, value=size, bins=bins)
+        bin_labels = dict(labels or {})
+        if size is not None:
+            bin_labels["Média"] = f"{bin_labels.get(size, size)} (média)"
+        return px.scatter(
+            df_bins,
+            x=x,
+            y=y,
+            color=color,
+            size="Contagem",
+            hover_data=["Média"] if size is not None else None,
+            title=title,
+            labels=bin_labels,
+            color_discrete_sequence=COLOR_PALETTE,
+            color_discrete_map=color_map,
+            render_mode="webgl",
+        )
+
+    spec = (x, y, color, size, hover_data, title, labels, color_map, max_points, bins)
+    fig = cached_figure(version, "plot_scatter", spec, build)
     st.plotly_chart(fig, use_container_width=True)
+    if binned:
+        cells = sum(len(trace.x) for trace in fig.data)
+        st.caption(
+            f"{len(df):,} pontos agregados em grade {bins}x{bins} "
+            f"({cells:,} células); tamanho = quantidade de registros."
+        )
 
 
-def plot_heatmap(df, numeric_cols, height=600):
+def plot_heatmap(df, numeric_cols, height=600, version=None):
     """
     Renderiza um mapa de calor de correlação.
     """
-    corr = df[numeric_cols].corr()
-    fig = px.imshow(
-        corr,
-        text_auto=True,
-        aspect="auto",
-        color_continuous_scale=[COLOR_PALETTE[1], "#FFFFFF", COLOR_PALETTE[0]],
-        origin="lower",
-        range_color=[-1, 1],
-    )
-    fig.update_layout(height=height)
+
+    def build():
+        fig = px.imshow(
+            df[numeric_cols].corr(),
+            text_auto=True,
+            aspect="auto",
+            color_continuous_scale=[COLOR_PALETTE[1], "#FFFFFF", COLOR_PALETTE[0]],
+            origin="lower",
+            range_color=[-1, 1],
+        )
+        fig.update_layout(height=height)
+        return fig
+
+    fig = cached_figure(version, "plot_heatmap", (list(numeric_cols), height), build)
     st.plotly_chart(fig, use_container_width=True)
 
 
@@ -159,9 +605,72 @@ def show_grouped_metrics(df, grouped_columns):
                 st.info(f"Nenhuma coluna disponível para o grupo: {group_title}")
 
 
-def show_univariate_grid(df, numeric_cols, categorical_cols, target_col="Categoria"):
+# Threads que montam as figuras das grades (GRID_WORKERS); com 1, tudo roda
+# na thread do script
+GRID_WORKERS = int(os.environ.get("GRID_WORKERS", min(8, os.cpu_count() or 1)))
+
+# Um único pool por processo, dimensionado na importação e nunca encerrado:
+# as sessões o compartilham e cada grade limita as próprias tarefas em voo
+_grid_pool = ThreadPoolExecutor(
+    max_workers=max(1, GRID_WORKERS), thread_name_prefix="grid-figures"
+)
+
+
+def build_figures(build, items, workers=GRID_WORKERS):
+    """
+    Gera build(item) para cada item, na ordem de `items`.
+
+    Com workers > 1, as agregações e as figuras são montadas em paralelo no
+    pool de threads compartilhado, com até `workers` tarefas em voo (e no
+    máximo GRID_WORKERS threads). O ganho vem sobretudo das agregações
+    (NumPy, pandas e DuckDB/Polars liberam o GIL); a validação das figuras
+    pelo plotly é Python puro. Cada figura é entregue assim que ela e as
+    anteriores ficam prontas. `build` não deve chamar st.*: a renderização
+    fica na thread do script (show_figure_grid).
+    """
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        for item in items:
+            yield build(item)
+        return
+    pending = deque()
+    for item in items:
+        if len(pending) == workers:
+            yield pending.popleft().result()
+        pending.append(_grid_pool.submit(build, item))
+    while pending:
+        yield pending.popleft().result()
+
+
+def show_figure_grid(figures, n_cols=3):
+    """
+    Renderiza as figuras em `n_cols` colunas, na ordem recebida.
+    """
+    cols = st.columns(n_cols)
+    for i, fig in enumerate(figures):
+        with cols[i % n_cols]:
+            st.plotly_chart(fig, use_container_width=True)
+
+
+def show_univariate_grid(
+    df,
+    numeric_cols,
+    categorical_cols,
+    target_col="Categoria",
+    version=None,
+    binned=True,
+    bins=HISTOGRAM_BINS,
+    workers=GRID_WORKERS,
+):
     """
     Exibe uma grade com histogramas de todas as colunas.
+
+    As contagens por `target_col` são calculadas no servidor (histogram_counts);
+    com binned=False, cada gráfico recebe todas as linhas (px.histogram).
+    Com `version` (identificador do conteúdo de df), as contagens vêm do
+    cache compartilhado de agregações (utils.aggregates) e cada figura do
+    cache de figuras (utils.figures). As figuras são montadas por
+    build_figures com `workers` threads.
     """
     with st.container(border=True):
         st.subheader("Todas as distribuições")
@@ -171,10 +680,9 @@ def show_univariate_grid(df, numeric_cols, categorical_cols, target_col="Categor
         if target_col in all_cols:
             all_cols.remove(target_col)
 
-        cols = st.columns(3)
-        for i, col in enumerate(all_cols):
-            with cols[i % 3]:
-                fig_all = px.histogram(
+        def build(col):
+            if not binned:
+                fig = px.histogram(
                     df,
                     x=col,
                     color=target_col,
@@ -182,36 +690,93 @@ def show_univariate_grid(df, numeric_cols, categorical_cols, target_col="Categor
                     barmode="group",
                     color_discrete_sequence=COLOR_PALETTE,
                 )
-                fig_all.update_layout(
-                    showlegend=False,
-                    height=300,
-                    margin=dict(l=0, r=0, t=30, b=0),
-                    yaxis_title=None,
+            else:
+                if version is None:
+                    counts = histogram_counts(df, col, target_col, bins)
+                elif not _is_binnable(df[col]):
+                    counts = groupby_agg(df, version, [col, target_col], "size")
+                else:
+                    counts = cached_aggregate(
+                        version,
+                        ("histograma", col, target_col, bins),
+                        lambda: histogram_counts(df, col, target_col, bins),
+                    )
+                fig = _histogram_figure(
+                    counts, col, target_col, col, "group", None, None
                 )
-                st.plotly_chart(fig_all, use_container_width=True)
+            fig.update_layout(
+                showlegend=False,
+                height=300,
+                margin=dict(l=0, r=0, t=30, b=0),
+                yaxis_title=None,
+            )
+            return fig
+
+        def cell(col):
+            return cached_figure(
+                version,
+                "show_univariate_grid",
+                (col, target_col, binned, bins),
+                lambda: build(col),
+            )
 
+        show_figure_grid(build_figures(cell, all_cols, workers))
 
-def show_bivariate_grid(df, numeric_cols, target_col="Categoria"):
+
+def show_bivariate_grid(
+    df,
+    numeric_cols,
+    target_col="Categoria",
+    version=None,
+    summary=True,
+    workers=GRID_WORKERS,
+):
     """
     Exibe uma grade com boxplots de todas as colunas numéricas contra o target.
+
+    As caixas são montadas a partir de estatísticas calculadas no servidor
+    (box_stats); com `version`, estatísticas e figuras ficam nos caches de
+    agregações e de figuras. Com summary=False, cada gráfico recebe todas as
+    linhas. As figuras são montadas por build_figures com `workers` threads.
     """
     with st.container(border=True):
         st.subheader("Todas as Análises Bivariadas")
-        cols = st.columns(3)
-        for i, col in enumerate(numeric_cols):
-            with cols[i % 3]:
-                fig_all = px.box(
+
+        def build(col):
+            title = f"{col} vs {target_col}"
+            if not summary:
+                fig = px.box(
                     df,
                     x=target_col,
                     y=col,
                     color=target_col,
-                    title=f"{col} vs {target_col}",
+                    title=title,
                     color_discrete_sequence=COLOR_PALETTE,
                 )
-                fig_all.update_layout(
-                    showlegend=False,
-                    height=300,
-                    margin=dict(l=0, r=0, t=30, b=0),
-                    xaxis_title=None,
-                )
-                st.plotly_chart(fig_all, use_container_width=True)
+            else:
+                if version is None:
+                    stats, outliers = box_stats(df, target_col, col)
+                else:
+                    stats, outliers = cached_aggregate(
+                        version,
+                        ("boxplot", target_col, col, BOX_MAX_OUTLIERS),
+                        lambda: box_stats(df, target_col, col),
+                    )
+                fig = _box_figure(stats, outliers, target_col, col, title)
+            fig.update_layout(
+                showlegend=False,
+                height=300,
+                margin=dict(l=0, r=0, t=30, b=0),
+                xaxis_title=None,
+            )
+            return fig
+
+        def cell(col):
+            return cached_figure(
+                version,
+                "show_bivariate_grid",
+                (col, target_col, summary),
+                lambda: build(col),
+            )
+
+        show_figure_grid(build_figures(cell, numeric_cols, workers))